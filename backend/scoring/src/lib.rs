@@ -1,6 +1,10 @@
-use ndarray::{s, Array1, Array2, Axis};
+use ndarray::{s, Array1, Array2, ArrayView2, Axis};
 use ndarray_conv::{ConvExt, ConvMode, PaddingMode};
+use numpy::{IntoPyArray, PyArray2, PyReadonlyArray1, PyReadonlyArray2};
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
+use rayon::prelude::*;
+use std::collections::{HashMap, VecDeque};
 
 const MAX_MOVE_SWAP: usize = 5;
 const MOVE_SWAP_COST: i64 = 2;
@@ -45,8 +49,16 @@ pub struct TempoSegmentationParams {
     pub max_segments: Option<usize>,
     #[pyo3(get, set)]
     pub smoothing_window: usize,
+    /// Changepoint search: `"pruned"` (PELT-style, near linear) or
+    /// `"exhaustive"` (every start/end pair). Both find the same segments;
+    /// `max_segments` always uses the exhaustive search.
+    #[pyo3(get)]
+    pub algorithm: String,
 }
 
+const PRUNED: &str = "pruned";
+const EXHAUSTIVE: &str = "exhaustive";
+
 impl Default for TempoSegmentationParams {
     fn default() -> Self {
         Self {
@@ -54,6 +66,7 @@ impl Default for TempoSegmentationParams {
             penalty: 3.5,
             max_segments: None,
             smoothing_window: 5,
+            algorithm: PRUNED.to_string(),
         }
     }
 }
@@ -61,21 +74,41 @@ impl Default for TempoSegmentationParams {
 #[pymethods]
 impl TempoSegmentationParams {
     #[new]
-    #[pyo3(signature = (min_segment_length=None, penalty=None, max_segments=None, smoothing_window=None))]
+    #[pyo3(signature = (min_segment_length=None, penalty=None, max_segments=None, smoothing_window=None, algorithm=None))]
     fn new(
         min_segment_length: Option<usize>,
         penalty: Option<f32>,
         max_segments: Option<usize>,
         smoothing_window: Option<usize>,
-    ) -> Self {
+        algorithm: Option<String>,
+    ) -> PyResult<Self> {
         let defaults = Self::default();
-        Self {
+        let algorithm = algorithm.unwrap_or(defaults.algorithm);
+        check_algorithm(&algorithm)?;
+        Ok(Self {
             min_segment_length: min_segment_length.unwrap_or(defaults.min_segment_length),
             penalty: penalty.unwrap_or(defaults.penalty),
             max_segments,
             smoothing_window: smoothing_window.unwrap_or(defaults.smoothing_window),
-        }
+            algorithm,
+        })
     }
+
+    #[setter]
+    fn set_algorithm(&mut self, algorithm: String) -> PyResult<()> {
+        check_algorithm(&algorithm)?;
+        self.algorithm = algorithm;
+        Ok(())
+    }
+}
+
+fn check_algorithm(algorithm: &str) -> PyResult<()> {
+    if algorithm != PRUNED && algorithm != EXHAUSTIVE {
+        return Err(PyValueError::new_err(format!(
+            "Unknown segmentation algorithm {algorithm:?}, expected {PRUNED:?} or {EXHAUSTIVE:?}"
+        )));
+    }
+    Ok(())
 }
 
 fn free_insert(idx: usize, insertion_range: Option<(usize, usize)>) -> bool {
@@ -86,13 +119,131 @@ fn free_insert(idx: usize, insertion_range: Option<(usize, usize)>) -> bool {
     // }
 }
 
+/// Cost assigned to cells outside the evaluated band. Large enough to never win a
+/// `min`, small enough that adding a few transition costs cannot overflow.
+const UNREACHABLE: i64 = i64::MAX / 4;
+
+/// DP matrix that only stores columns `lo[i]..=hi[i]` of each row `i`.
+///
+/// Reads outside the stored band return `UNREACHABLE`, so the recurrence and the
+/// backtrack can be written exactly as for a dense matrix.
+struct BandedMatrix {
+    lo: Vec<usize>,
+    hi: Vec<usize>,
+    offsets: Vec<usize>,
+    cells: Vec<i64>,
+}
+
+impl BandedMatrix {
+    fn new(lo: Vec<usize>, hi: Vec<usize>) -> Self {
+        let mut offsets = Vec::with_capacity(lo.len());
+        let mut total = 0usize;
+        for (&l, &h) in lo.iter().zip(hi.iter()) {
+            offsets.push(total);
+            total += h + 1 - l;
+        }
+        Self {
+            lo,
+            hi,
+            offsets,
+            cells: vec![UNREACHABLE; total],
+        }
+    }
+
+    fn nrows(&self) -> usize {
+        self.lo.len()
+    }
+
+    #[inline]
+    fn get(&self, i: usize, j: usize) -> i64 {
+        if j < self.lo[i] || j > self.hi[i] {
+            UNREACHABLE
+        } else {
+            self.cells[self.offsets[i] + j - self.lo[i]]
+        }
+    }
+
+    #[inline]
+    fn set(&mut self, i: usize, j: usize, value: i64) {
+        let idx = self.offsets[i] + j - self.lo[i];
+        self.cells[idx] = value;
+    }
+}
+
+/// Column range evaluated for every row of the (n+1)×(m+1) alignment matrix.
+///
+/// Without a window every row spans all columns (the classic dense DP). With a
+/// window `(start, end)` over the reference, the played sequence is expected to
+/// map onto reference rows `start..end`: rows before the window are pinned to
+/// column 0 and rows after it to column `m`, so those reference notes can only be
+/// deleted. With a `band` the window rows are further limited to `band` columns on
+/// either side of the diagonal running from `(start, 0)` to `(end, m)`.
+///
+/// Each row reaches at least up to the start of the next one, which keeps the
+/// band connected so a path from `(0, 0)` to `(n, m)` always exists.
+fn alignment_band(
+    n: usize,
+    m: usize,
+    window: Option<(usize, usize)>,
+    band: Option<usize>,
+) -> (Vec<usize>, Vec<usize>) {
+    let window = match (window, band) {
+        (Some((start, end)), _) => {
+            let end = end.min(n);
+            if start >= end {
+                None
+            } else {
+                Some((start, end))
+            }
+        }
+        (None, Some(_)) if n > 0 => Some((0, n)),
+        _ => None,
+    };
+
+    let Some((start, end)) = window else {
+        return (vec![0; n + 1], vec![m; n + 1]);
+    };
+
+    let mut lo = Vec::with_capacity(n + 1);
+    let mut hi = Vec::with_capacity(n + 1);
+    match band {
+        None => {
+            for i in 0..=n {
+                if i < start {
+                    lo.push(0);
+                    hi.push(0);
+                } else if i <= end {
+                    lo.push(0);
+                    hi.push(m);
+                } else {
+                    lo.push(m);
+                    hi.push(m);
+                }
+            }
+        }
+        Some(width) => {
+            let slope = m as f64 / (end - start) as f64;
+            let center = |i: usize| (i as f64 - start as f64) * slope;
+            let clamp = |v: f64| v.max(0.0).min(m as f64) as usize;
+            for i in 0..=n {
+                lo.push(clamp(center(i).floor() - width as f64));
+                hi.push(clamp(center(i + 1).ceil() + width as f64));
+            }
+        }
+    }
+    (lo, hi)
+}
+
 #[pyfunction]
 #[pyo3(
     name = "edit_dist",
     signature = (
         s_pitches,
         t_pitches,
-        free_insertion_range=None
+        free_insertion_range=None,
+        window=None,
+        band=None,
+        memory_limit=None
     )
 )]
 
@@ -100,20 +251,454 @@ pub fn edit_dist_py(
     s_pitches: Vec<i64>,
     t_pitches: Vec<i64>,
     free_insertion_range: Option<(usize, usize)>,
+    window: Option<(usize, usize)>,
+    band: Option<usize>,
+    memory_limit: Option<usize>,
 ) -> PyResult<(Vec<OperationRecord>, Vec<(usize, usize)>, i64)> {
-    let (ops, aligned, total_cost) = edit_dist(&s_pitches, &t_pitches, free_insertion_range);
+    let (ops, aligned, total_cost) = edit_dist_within(
+        &s_pitches,
+        &t_pitches,
+        free_insertion_range,
+        window,
+        band,
+        memory_limit,
+        true,
+    )
+    .map_err(PyValueError::new_err)?;
     Ok((ops, aligned, total_cost))
 }
 
-fn edit_dist(
+/// NumPy variant of `edit_dist`: reads contiguous int64 pitch arrays in place
+/// and returns the edits as an `(k, 5)` int64 array (see `ops_to_array`) and
+/// the aligned pairs as an `(p, 2)` int64 array. The GIL is released while the
+/// DP runs.
+#[pyfunction]
+#[pyo3(
+    name = "edit_dist_array",
+    signature = (
+        s_pitches,
+        t_pitches,
+        free_insertion_range=None,
+        window=None,
+        band=None,
+        memory_limit=None
+    )
+)]
+pub fn edit_dist_array_py<'py>(
+    py: Python<'py>,
+    s_pitches: PyReadonlyArray1<'py, i64>,
+    t_pitches: PyReadonlyArray1<'py, i64>,
+    free_insertion_range: Option<(usize, usize)>,
+    window: Option<(usize, usize)>,
+    band: Option<usize>,
+    memory_limit: Option<usize>,
+) -> PyResult<(Bound<'py, PyArray2<i64>>, Bound<'py, PyArray2<i64>>, i64)> {
+    let s_pitches = s_pitches.as_slice()?;
+    let t_pitches = t_pitches.as_slice()?;
+    let (ops, aligned, total_cost) = py
+        .detach(|| {
+            edit_dist_within(
+                s_pitches,
+                t_pitches,
+                free_insertion_range,
+                window,
+                band,
+                memory_limit,
+                true,
+            )
+        })
+        .map_err(PyValueError::new_err)?;
+    Ok((
+        ops_to_array(&ops).into_pyarray(py),
+        pairs_to_array(&aligned).into_pyarray(py),
+        total_cost,
+    ))
+}
+
+/// Align several played takes against one reference. The GIL is released and
+/// the takes are spread over the rayon thread pool; results keep input order.
+#[pyfunction]
+#[pyo3(
+    name = "edit_dist_batch",
+    signature = (
+        s_pitches,
+        takes,
+        free_insertion_range=None,
+        window=None,
+        band=None,
+        memory_limit=None
+    )
+)]
+pub fn edit_dist_batch_py<'py>(
+    py: Python<'py>,
+    s_pitches: PyReadonlyArray1<'py, i64>,
+    takes: Vec<PyReadonlyArray1<'py, i64>>,
+    free_insertion_range: Option<(usize, usize)>,
+    window: Option<(usize, usize)>,
+    band: Option<usize>,
+    memory_limit: Option<usize>,
+) -> PyResult<Vec<(Bound<'py, PyArray2<i64>>, Bound<'py, PyArray2<i64>>, i64)>> {
+    let s_pitches = s_pitches.as_slice()?;
+    let takes = takes
+        .iter()
+        .map(|take| take.as_slice())
+        .collect::<Result<Vec<_>, _>>()?;
+    let results = py
+        .detach(|| {
+            takes
+                .par_iter()
+                .map(|t_pitches| {
+                    edit_dist_within(
+                        s_pitches,
+                        t_pitches,
+                        free_insertion_range,
+                        window,
+                        band,
+                        memory_limit,
+                        true,
+                    )
+                })
+                .collect::<Result<Vec<_>, _>>()
+        })
+        .map_err(PyValueError::new_err)?;
+    Ok(results
+        .into_iter()
+        .map(|(ops, aligned, total_cost)| {
+            (
+                ops_to_array(&ops).into_pyarray(py),
+                pairs_to_array(&aligned).into_pyarray(py),
+                total_cost,
+            )
+        })
+        .collect())
+}
+
+/// NumPy variant of `edit_dist` for long takes: exact-match anchors split the
+/// alignment into gaps that are aligned in parallel (see `edit_dist_anchored`).
+/// Returns the same arrays as `edit_dist_array`.
+#[pyfunction]
+#[pyo3(
+    name = "edit_dist_anchored_array",
+    signature = (
+        s_pitches,
+        t_pitches,
+        free_insertion_range=None,
+        anchor_length=DEFAULT_ANCHOR_LENGTH,
+        memory_limit=None
+    )
+)]
+pub fn edit_dist_anchored_array_py<'py>(
+    py: Python<'py>,
+    s_pitches: PyReadonlyArray1<'py, i64>,
+    t_pitches: PyReadonlyArray1<'py, i64>,
+    free_insertion_range: Option<(usize, usize)>,
+    anchor_length: usize,
+    memory_limit: Option<usize>,
+) -> PyResult<(Bound<'py, PyArray2<i64>>, Bound<'py, PyArray2<i64>>, i64)> {
+    let s_pitches = s_pitches.as_slice()?;
+    let t_pitches = t_pitches.as_slice()?;
+    let (ops, aligned, total_cost) = py
+        .detach(|| {
+            edit_dist_anchored(
+                s_pitches,
+                t_pitches,
+                free_insertion_range,
+                anchor_length,
+                memory_limit,
+            )
+        })
+        .map_err(PyValueError::new_err)?;
+    Ok((
+        ops_to_array(&ops).into_pyarray(py),
+        pairs_to_array(&aligned).into_pyarray(py),
+        total_cost,
+    ))
+}
+
+/// Alignment of a take that is still being played, one played note at a time.
+///
+/// The DP is filled column by column (one column per played note) and only the
+/// last `CONTEXT_ROWS + 1` columns are kept, so each note costs O(n) for n
+/// reference notes regardless of how long the take is. To stay causal the
+/// transition that matches a reference note to a *later* played note is left
+/// out, and the take may start anywhere in the reference: skipping reference
+/// notes before the first played one is free. The final result should still
+/// come from `edit_dist`.
+#[pyclass(module = "scoring_native")]
+pub struct StreamingAligner {
+    s_pitches: Vec<i64>,
+    t_pitches: Vec<i64>,
+    /// Most recent DP columns, oldest first; each has `n + 1` rows.
+    columns: VecDeque<Vec<i64>>,
+}
+
+#[pymethods]
+impl StreamingAligner {
+    #[new]
+    fn new(s_pitches: Vec<i64>) -> Self {
+        let first = vec![0; s_pitches.len() + 1];
+        Self {
+            s_pitches,
+            t_pitches: Vec::new(),
+            columns: VecDeque::from([first]),
+        }
+    }
+
+    /// Align the next played note. Returns `(s_index, matched, position,
+    /// cost)`: the reference note it was aligned to (`None` for an extra
+    /// note), whether the pitches agree, the number of reference notes covered
+    /// so far and the cost of the alignment up to there.
+    fn push(&mut self, pitch: i64) -> (Option<usize>, bool, usize, i64) {
+        self.advance(pitch)
+    }
+
+    /// `push` for several notes at once, with the GIL released.
+    fn extend(
+        &mut self,
+        py: Python<'_>,
+        pitches: Vec<i64>,
+    ) -> Vec<(Option<usize>, bool, usize, i64)> {
+        py.detach(|| {
+            pitches
+                .into_iter()
+                .map(|pitch| self.advance(pitch))
+                .collect()
+        })
+    }
+
+    /// Reference notes covered by the best alignment so far.
+    #[getter]
+    fn position(&self) -> usize {
+        self.best_row().0
+    }
+
+    fn __len__(&self) -> usize {
+        self.t_pitches.len()
+    }
+}
+
+impl StreamingAligner {
+    /// Column `j - back` of the DP, where `j` is the newest column.
+    fn column(&self, back: usize) -> &[i64] {
+        &self.columns[self.columns.len() - 1 - back]
+    }
+
+    /// Row of the newest column with the lowest cost, i.e. where the take is
+    /// most likely to be. Ties go to the earliest row.
+    fn best_row(&self) -> (usize, i64) {
+        let last = self.column(0);
+        let mut best = (0, last[0]);
+        for (i, &cost) in last.iter().enumerate().skip(1) {
+            if cost < best.1 {
+                best = (i, cost);
+            }
+        }
+        best
+    }
+
+    fn advance(&mut self, pitch: i64) -> (Option<usize>, bool, usize, i64) {
+        self.t_pitches.push(pitch);
+        let s = &self.s_pitches;
+        let t = &self.t_pitches;
+        let n = s.len();
+        let j = t.len();
+
+        let prev = self.column(0);
+        let mut column = vec![UNREACHABLE; n + 1];
+        column[0] = prev[0] + OP_COST;
+        for i in 1..=n {
+            let sub_cost = if s[i - 1] == t[j - 1] { 0 } else { OP_COST };
+            let mut best = min3(
+                prev[i - 1] + sub_cost,
+                column[i - 1] + OP_COST,
+                prev[i] + OP_COST,
+            );
+            for k in 1..=MAX_MOVE_SWAP.min(j - 1) {
+                let earlier = self.column(k);
+                if s[i - 1] == t[j - 1 - k] {
+                    best = best.min(earlier[i - 1] + MOVE_SWAP_COST);
+                }
+                if i >= 1 + k && s[i - 1] == t[j - 1 - k] && s[i - 1 - k] == t[j - 1] {
+                    best = best.min(earlier[i - 1 - k] + MOVE_SWAP_COST);
+                }
+            }
+            column[i] = best.min(UNREACHABLE);
+        }
+
+        // `newest_match` looks back one column further than this loop did, to
+        // the columns the transitions into the new one came from.
+        if self.columns.len() == CONTEXT_ROWS + 1 {
+            self.columns.pop_front();
+        }
+        self.columns.push_back(column);
+
+        let (position, cost) = self.best_row();
+        let (s_index, matched) = self.newest_match(position);
+        (s_index, matched, position, cost)
+    }
+
+    /// Reference note the newest played note is aligned to on the best path
+    /// ending at `row`, following the same transition order as `backtrack`.
+    fn newest_match(&self, row: usize) -> (Option<usize>, bool) {
+        let s = &self.s_pitches;
+        let t = &self.t_pitches;
+        let j = t.len();
+        let column = self.column(0);
+        let prev = self.column(1);
+
+        let mut i = row;
+        while i > 0 {
+            let sub_cost = if s[i - 1] == t[j - 1] { 0 } else { OP_COST };
+            if column[i] == prev[i - 1] + sub_cost {
+                return (Some(i - 1), sub_cost == 0);
+            }
+            if column[i] == column[i - 1] + OP_COST {
+                i -= 1;
+                continue;
+            }
+            if column[i] == prev[i] + OP_COST {
+                return (None, false);
+            }
+            // Reached by a move from an earlier played note: this one is skipped.
+            for k in 1..=MAX_MOVE_SWAP.min(j - 1) {
+                if column[i] == self.column(k + 1)[i - 1] + MOVE_SWAP_COST {
+                    return (None, false);
+                }
+            }
+            for k in 1..=MAX_MOVE_SWAP.min(j - 1) {
+                // `column(0)` is already the new column, so column `j - 1 - k`
+                // is `k + 1` back.
+                let earlier = self.column(k + 1);
+                if i >= 1 + k
+                    && s[i - 1] == t[j - 1 - k]
+                    && s[i - 1 - k] == t[j - 1]
+                    && column[i] == earlier[i - 1 - k] + MOVE_SWAP_COST
+                {
+                    return (Some(i - 1 - k), true);
+                }
+            }
+            return (None, false);
+        }
+        (None, false)
+    }
+}
+
+/// Columns: kind, s_index, t_index (-1 when absent), pos, t_pos.
+fn ops_to_array(ops: &[OperationRecord]) -> Array2<i64> {
+    let mut flat = Vec::with_capacity(ops.len() * 5);
+    for op in ops {
+        flat.extend_from_slice(&[
+            op.kind as i64,
+            op.s_index as i64,
+            op.t_index.map_or(-1, |t| t as i64),
+            op.pos as i64,
+            op.t_pos as i64,
+        ]);
+    }
+    Array2::from_shape_vec((ops.len(), 5), flat).expect("edit array shape")
+}
+
+fn pairs_to_array(pairs: &[(usize, usize)]) -> Array2<i64> {
+    let flat = pairs
+        .iter()
+        .flat_map(|&(a, b)| [a as i64, b as i64])
+        .collect();
+    Array2::from_shape_vec((pairs.len(), 2), flat).expect("pair array shape")
+}
+
+fn pairs_from_array(pairs: ArrayView2<i64>) -> PyResult<Vec<(usize, usize)>> {
+    if pairs.ncols() != 2 {
+        return Err(PyValueError::new_err(format!(
+            "aligned pairs must have shape (n, 2), got {:?}",
+            pairs.shape()
+        )));
+    }
+    pairs
+        .rows()
+        .into_iter()
+        .map(
+            |row| match (usize::try_from(row[0]), usize::try_from(row[1])) {
+                (Ok(a), Ok(b)) => Ok((a, b)),
+                _ => Err(PyValueError::new_err("aligned pairs must be non-negative")),
+            },
+        )
+        .collect()
+}
+
+/// Align using the dense (banded) DP when it fits in `memory_limit` bytes and
+/// fall back to the checkpointed DP otherwise. Both produce identical results.
+///
+/// `open_end` makes deleting reference notes after the last played note cheap,
+/// as a take may stop before the end of the score. Gaps between anchors are
+/// closed on both sides and align with it off.
+fn edit_dist_within(
     s_pitches: &[i64],
     t_pitches: &[i64],
     free_insertion_range: Option<(usize, usize)>,
-) -> (Vec<OperationRecord>, Vec<(usize, usize)>, i64) {
+    window: Option<(usize, usize)>,
+    band: Option<usize>,
+    memory_limit: Option<usize>,
+    open_end: bool,
+) -> Result<(Vec<OperationRecord>, Vec<(usize, usize)>, i64), String> {
+    let Some(limit) = memory_limit else {
+        return Ok(edit_dist(
+            s_pitches,
+            t_pitches,
+            free_insertion_range,
+            window,
+            band,
+            open_end,
+        ));
+    };
+
     let n = s_pitches.len();
     let m = t_pitches.len();
+    let (lo, hi) = alignment_band(n, m, window, band);
+    let cells: usize = lo.iter().zip(hi.iter()).map(|(&l, &h)| h + 1 - l).sum();
+    if cells.saturating_mul(size_of::<i64>()) <= limit {
+        return Ok(edit_dist(
+            s_pitches,
+            t_pitches,
+            free_insertion_range,
+            window,
+            band,
+            open_end,
+        ));
+    }
+
+    let block = checkpoint_block_size(n);
+    let widest = lo.iter().zip(hi.iter()).map(|(&l, &h)| h + 1 - l).max();
+    let needed = checkpointed_bytes(n, widest.unwrap_or(0), block);
+    if needed > limit {
+        return Err(format!(
+            "Too big: aligning {n}x{m} notes needs about {needed} bytes, limit is {limit}"
+        ));
+    }
+    let insertion_range = normalize_insertion_range(free_insertion_range, m);
+    let mut dp = CheckpointedTable::new(
+        s_pitches,
+        t_pitches,
+        insertion_range,
+        open_end,
+        lo,
+        hi,
+        block,
+    );
+    Ok(backtrack(
+        &mut dp,
+        s_pitches,
+        t_pitches,
+        insertion_range,
+        open_end,
+        m,
+    ))
+}
 
-    let insertion_range = free_insertion_range.and_then(|(start, end)| {
+fn normalize_insertion_range(
+    free_insertion_range: Option<(usize, usize)>,
+    m: usize,
+) -> Option<(usize, usize)> {
+    free_insertion_range.and_then(|(start, end)| {
         if start >= end {
             None
         } else {
@@ -125,73 +710,503 @@ fn edit_dist(
                 Some((start, end))
             }
         }
-    });
+    })
+}
+
+/// Value of cell `(i, j)` given read access to every cell it depends on: rows
+/// `i - 1 - MAX_MOVE_SWAP..i` and the columns of row `i` left of `j`.
+#[inline]
+fn cell_cost(
+    i: usize,
+    j: usize,
+    s_pitches: &[i64],
+    t_pitches: &[i64],
+    insertion_range: Option<(usize, usize)>,
+    open_end: bool,
+    dp: impl Fn(usize, usize) -> i64,
+) -> i64 {
+    let m = t_pitches.len();
+    if j == 0 {
+        return (i as i64) * OP_COST;
+    }
+    let insert_cost = if free_insert(j - 1, insertion_range) {
+        REDUCED_COST
+    } else {
+        OP_COST
+    };
+    if i == 0 {
+        return dp(0, j - 1) + insert_cost;
+    }
+    let delete_cost = if open_end && j == m {
+        REDUCED_COST
+    } else {
+        OP_COST
+    };
+    let mut best = min3(
+        dp(i - 1, j - 1)
+            + if s_pitches[i - 1] == t_pitches[j - 1] {
+                0
+            } else {
+                OP_COST
+            },
+        dp(i - 1, j) + delete_cost,
+        dp(i, j - 1) + insert_cost,
+    );
 
-    let mut dp = Array2::<i64>::zeros((n + 1, m + 1));
+    for k in 1..=MAX_MOVE_SWAP {
+        if j + k <= m && s_pitches[i - 1] == t_pitches[j + k - 1] {
+            best = best.min(dp(i - 1, j + k) + MOVE_SWAP_COST);
+        }
+    }
 
-    for j in 1..=m {
-        let cost = if free_insert(j - 1, insertion_range) {
-            REDUCED_COST
+    for k in 1..=MAX_MOVE_SWAP {
+        if j >= 1 + k && s_pitches[i - 1] == t_pitches[j - 1 - k] {
+            best = best.min(dp(i - 1, j - 1 - k) + MOVE_SWAP_COST);
+        }
+    }
+
+    for k in 1..=MAX_MOVE_SWAP {
+        if i >= 1 + k && j >= 1 + k {
+            if s_pitches[i - 1] == t_pitches[j - 1 - k] && s_pitches[i - 1 - k] == t_pitches[j - 1]
+            {
+                best = best.min(dp(i - 1 - k, j - 1 - k) + MOVE_SWAP_COST);
+            }
+        }
+    }
+
+    best.min(UNREACHABLE)
+}
+
+fn edit_dist(
+    s_pitches: &[i64],
+    t_pitches: &[i64],
+    free_insertion_range: Option<(usize, usize)>,
+    window: Option<(usize, usize)>,
+    band: Option<usize>,
+    open_end: bool,
+) -> (Vec<OperationRecord>, Vec<(usize, usize)>, i64) {
+    let n = s_pitches.len();
+    let m = t_pitches.len();
+
+    let insertion_range = normalize_insertion_range(free_insertion_range, m);
+
+    let (lo, hi) = alignment_band(n, m, window, band);
+    let mut dp = BandedMatrix::new(lo, hi);
+
+    for i in 0..=n {
+        for j in dp.lo[i]..=dp.hi[i] {
+            let value = cell_cost(
+                i,
+                j,
+                s_pitches,
+                t_pitches,
+                insertion_range,
+                open_end,
+                |a, b| dp.get(a, b),
+            );
+            dp.set(i, j, value);
+        }
+    }
+
+    backtrack(&mut dp, s_pitches, t_pitches, insertion_range, open_end, m)
+}
+
+const DEFAULT_ANCHOR_LENGTH: usize = 8;
+/// Notes handed back to the gaps at both ends of an anchor, so edits right
+/// next to it can still be explained by moves and swaps.
+const ANCHOR_MARGIN: usize = 2;
+
+/// Exact match `s[s_start..s_start + len] == t[t_start..t_start + len]`.
+#[derive(Clone, Copy, Debug)]
+struct Anchor {
+    s_start: usize,
+    t_start: usize,
+    len: usize,
+}
+
+/// Patience-style anchors: runs of `anchor_length` pitches that occur exactly
+/// once in each sequence, chained into the longest sequence increasing in both,
+/// merged along diagonals and trimmed so anchors never overlap.
+fn find_anchors(s_pitches: &[i64], t_pitches: &[i64], anchor_length: usize) -> Vec<Anchor> {
+    let k = anchor_length.max(1);
+    if s_pitches.len() < k || t_pitches.len() < k {
+        return Vec::new();
+    }
+
+    // (occurrences in s, last s index, occurrences in t, last t index)
+    let mut grams: HashMap<&[i64], (u32, usize, u32, usize)> = HashMap::new();
+    for (i, gram) in s_pitches.windows(k).enumerate() {
+        let entry = grams.entry(gram).or_insert((0, 0, 0, 0));
+        entry.0 += 1;
+        entry.1 = i;
+    }
+    for (j, gram) in t_pitches.windows(k).enumerate() {
+        if let Some(entry) = grams.get_mut(gram) {
+            entry.2 += 1;
+            entry.3 = j;
+        }
+    }
+    let mut pairs: Vec<(usize, usize)> = grams
+        .values()
+        .filter(|&&(s_count, _, t_count, _)| s_count == 1 && t_count == 1)
+        .map(|&(_, i, _, j)| (i, j))
+        .collect();
+    pairs.sort_unstable();
+
+    let mut anchors: Vec<Anchor> = Vec::new();
+    for (i, j) in longest_increasing_chain(&pairs) {
+        if let Some(last) = anchors.last_mut() {
+            let s_end = last.s_start + last.len;
+            let t_end = last.t_start + last.len;
+            if i + last.t_start == j + last.s_start && i >= last.s_start && i <= s_end {
+                last.len = i + k - last.s_start;
+                continue;
+            }
+            let skip = s_end.saturating_sub(i).max(t_end.saturating_sub(j));
+            if skip < k {
+                anchors.push(Anchor {
+                    s_start: i + skip,
+                    t_start: j + skip,
+                    len: k - skip,
+                });
+            }
         } else {
-            OP_COST
-        };
-        dp[[0, j]] = dp[[0, j - 1]] + cost;
+            anchors.push(Anchor {
+                s_start: i,
+                t_start: j,
+                len: k,
+            });
+        }
+    }
+
+    anchors
+        .into_iter()
+        .filter(|anchor| anchor.len > 2 * ANCHOR_MARGIN)
+        .map(|anchor| Anchor {
+            s_start: anchor.s_start + ANCHOR_MARGIN,
+            t_start: anchor.t_start + ANCHOR_MARGIN,
+            len: anchor.len - 2 * ANCHOR_MARGIN,
+        })
+        .collect()
+}
+
+/// Longest chain of `pairs` (sorted by first element) whose second elements
+/// strictly increase, found by patience sorting in O(p log p).
+fn longest_increasing_chain(pairs: &[(usize, usize)]) -> Vec<(usize, usize)> {
+    let mut tails: Vec<usize> = Vec::new();
+    let mut prev: Vec<Option<usize>> = vec![None; pairs.len()];
+    for (idx, &(_, j)) in pairs.iter().enumerate() {
+        let pile = tails.partition_point(|&tail| pairs[tail].1 < j);
+        if pile > 0 {
+            prev[idx] = Some(tails[pile - 1]);
+        }
+        if pile == tails.len() {
+            tails.push(idx);
+        } else {
+            tails[pile] = idx;
+        }
     }
 
-    for i in 1..=n {
-        dp[[i, 0]] = (i as i64) * OP_COST;
-        for j in 1..=m {
-            let insert_cost = if free_insert(j - 1, insertion_range) {
-                REDUCED_COST
+    let mut chain = Vec::with_capacity(tails.len());
+    let mut current = tails.last().copied();
+    while let Some(idx) = current {
+        chain.push(pairs[idx]);
+        current = prev[idx];
+    }
+    chain.reverse();
+    chain
+}
+
+/// Align long, mostly correct takes: anchored runs are matched directly and
+/// only the gaps between them go through the DP, in parallel. With few errors
+/// the gaps are small and the cost approaches linear in the note count.
+fn edit_dist_anchored(
+    s_pitches: &[i64],
+    t_pitches: &[i64],
+    free_insertion_range: Option<(usize, usize)>,
+    anchor_length: usize,
+    memory_limit: Option<usize>,
+) -> Result<(Vec<OperationRecord>, Vec<(usize, usize)>, i64), String> {
+    let anchors = find_anchors(s_pitches, t_pitches, anchor_length);
+    if anchors.is_empty() {
+        return edit_dist_within(
+            s_pitches,
+            t_pitches,
+            free_insertion_range,
+            None,
+            None,
+            memory_limit,
+            true,
+        );
+    }
+
+    let mut gaps = Vec::with_capacity(anchors.len() + 1);
+    let (mut s_start, mut t_start) = (0, 0);
+    for anchor in &anchors {
+        gaps.push((s_start, anchor.s_start, t_start, anchor.t_start));
+        s_start = anchor.s_start + anchor.len;
+        t_start = anchor.t_start + anchor.len;
+    }
+    gaps.push((s_start, s_pitches.len(), t_start, t_pitches.len()));
+
+    let last_gap = gaps.len() - 1;
+    let results = gaps
+        .par_iter()
+        .enumerate()
+        .map(|(idx, &gap)| {
+            align_gap(
+                s_pitches,
+                t_pitches,
+                gap,
+                free_insertion_range,
+                memory_limit,
+                idx == last_gap,
+            )
+        })
+        .collect::<Result<Vec<_>, _>>()?;
+
+    let mut edits = Vec::new();
+    let mut aligned_indices = Vec::with_capacity(t_pitches.len());
+    let mut total_cost = 0;
+    for (idx, (gap_edits, gap_aligned, gap_cost)) in results.into_iter().enumerate() {
+        edits.extend(gap_edits);
+        aligned_indices.extend(gap_aligned);
+        total_cost += gap_cost;
+        if let Some(anchor) = anchors.get(idx) {
+            aligned_indices
+                .extend((0..anchor.len).map(|d| (anchor.s_start + d, anchor.t_start + d)));
+        }
+    }
+    Ok((edits, aligned_indices, total_cost))
+}
+
+/// Align `s[s_start..s_end]` against `t[t_start..t_end]` and shift the result
+/// back into whole-sequence indices.
+fn align_gap(
+    s_pitches: &[i64],
+    t_pitches: &[i64],
+    (s_start, s_end, t_start, t_end): (usize, usize, usize, usize),
+    free_insertion_range: Option<(usize, usize)>,
+    memory_limit: Option<usize>,
+    open_end: bool,
+) -> Result<(Vec<OperationRecord>, Vec<(usize, usize)>, i64), String> {
+    if t_start == t_end {
+        let delete_cost = if open_end { REDUCED_COST } else { OP_COST };
+        let edits = (s_start..s_end)
+            .map(|i| OperationRecord::new(1, i, None, i, t_start))
+            .collect();
+        return Ok((edits, Vec::new(), delete_cost * (s_end - s_start) as i64));
+    }
+
+    let insertion_range = free_insertion_range
+        .map(|(start, end)| (start.saturating_sub(t_start), end.saturating_sub(t_start)));
+    let (edits, aligned, cost) = edit_dist_within(
+        &s_pitches[s_start..s_end],
+        &t_pitches[t_start..t_end],
+        insertion_range,
+        None,
+        None,
+        memory_limit,
+        open_end,
+    )?;
+
+    let edits = edits
+        .into_iter()
+        .map(|op| {
+            // Insertions before the gap's first reference note point at the
+            // note preceding the gap, like every other insertion.
+            let s_index = if op.kind == 2 && op.pos == 0 && s_start > 0 {
+                s_start - 1
             } else {
-                OP_COST
+                op.s_index + s_start
             };
-            let delete_cost = if j == m { REDUCED_COST } else { OP_COST };
-            let mut best = min3(
-                dp[[i - 1, j - 1]]
-                    + if s_pitches[i - 1] == t_pitches[j - 1] {
-                        0
-                    } else {
-                        OP_COST
-                    },
-                dp[[i - 1, j]] + delete_cost,
-                dp[[i, j - 1]] + insert_cost,
-            );
+            OperationRecord::new(
+                op.kind,
+                s_index,
+                op.t_index.map(|j| j + t_start),
+                op.pos + s_start,
+                op.t_pos + t_start,
+            )
+        })
+        .collect();
+    let aligned = aligned
+        .into_iter()
+        .map(|(i, j)| (i + s_start, j + t_start))
+        .collect();
+    Ok((edits, aligned, cost))
+}
 
-            for k in 1..=MAX_MOVE_SWAP {
-                if j + k <= m && s_pitches[i - 1] == t_pitches[j + k - 1] {
-                    best = best.min(dp[[i - 1, j + k]] + MOVE_SWAP_COST);
-                }
-            }
+/// Rows each DP row depends on: the previous row plus the swap transitions that
+/// reach back `MAX_MOVE_SWAP` further.
+const CONTEXT_ROWS: usize = MAX_MOVE_SWAP + 1;
+const MIN_CHECKPOINT_BLOCK: usize = 4 * CONTEXT_ROWS;
 
-            for k in 1..=MAX_MOVE_SWAP {
-                if j >= 1 + k && s_pitches[i - 1] == t_pitches[j - 1 - k] {
-                    best = best.min(dp[[i - 1, j - 1 - k]] + MOVE_SWAP_COST);
-                }
+/// Block height minimising `CONTEXT_ROWS * n / block + block`, the number of rows
+/// the checkpointed DP keeps alive at once.
+fn checkpoint_block_size(n: usize) -> usize {
+    (((CONTEXT_ROWS * (n + 1)) as f64).sqrt().ceil() as usize).max(MIN_CHECKPOINT_BLOCK)
+}
+
+fn checkpointed_bytes(n: usize, row_width: usize, block: usize) -> usize {
+    let blocks = (n + 1).div_ceil(block);
+    let rows = blocks * CONTEXT_ROWS + block + 2 * CONTEXT_ROWS;
+    rows.saturating_mul(row_width)
+        .saturating_mul(size_of::<i32>())
+}
+
+/// Read access to a filled alignment DP, shared by the dense and checkpointed
+/// paths so both go through the same backtrack.
+trait DpTable {
+    fn nrows(&self) -> usize;
+    fn get(&mut self, i: usize, j: usize) -> i64;
+}
+
+impl DpTable for BandedMatrix {
+    fn nrows(&self) -> usize {
+        BandedMatrix::nrows(self)
+    }
+
+    fn get(&mut self, i: usize, j: usize) -> i64 {
+        BandedMatrix::get(self, i, j)
+    }
+}
+
+/// One stored DP row covering columns `lo..lo + cells.len()`.
+///
+/// Cells are kept as `i32`: every in-band cell is reachable, so values are
+/// bounded by `OP_COST * (n + m)`.
+#[derive(Clone)]
+struct DpRow {
+    lo: usize,
+    cells: Vec<i32>,
+}
+
+impl DpRow {
+    #[inline]
+    fn get(&self, j: usize) -> i64 {
+        if j < self.lo || j >= self.lo + self.cells.len() {
+            UNREACHABLE
+        } else {
+            self.cells[j - self.lo] as i64
+        }
+    }
+}
+
+/// Alignment DP that keeps only `CONTEXT_ROWS` rows at the start of every block
+/// of `block` rows. The backtrack walks rows downwards, so whenever it leaves
+/// the loaded block the previous block is recomputed from its checkpoint. Memory
+/// is O(sqrt(n)·m) at the price of filling the matrix twice.
+struct CheckpointedTable<'a> {
+    s_pitches: &'a [i64],
+    t_pitches: &'a [i64],
+    insertion_range: Option<(usize, usize)>,
+    open_end: bool,
+    lo: Vec<usize>,
+    hi: Vec<usize>,
+    block: usize,
+    checkpoints: Vec<Vec<DpRow>>,
+    loaded_start: usize,
+    loaded: Vec<DpRow>,
+}
+
+impl<'a> CheckpointedTable<'a> {
+    fn new(
+        s_pitches: &'a [i64],
+        t_pitches: &'a [i64],
+        insertion_range: Option<(usize, usize)>,
+        open_end: bool,
+        lo: Vec<usize>,
+        hi: Vec<usize>,
+        block: usize,
+    ) -> Self {
+        let mut table = Self {
+            s_pitches,
+            t_pitches,
+            insertion_range,
+            open_end,
+            lo,
+            hi,
+            block,
+            checkpoints: Vec::new(),
+            loaded_start: 0,
+            loaded: Vec::new(),
+        };
+
+        let n = table.s_pitches.len();
+        let mut context: Vec<DpRow> = Vec::with_capacity(CONTEXT_ROWS + 1);
+        for i in 0..=n {
+            if i % block == 0 {
+                table.checkpoints.push(context.clone());
             }
+            let row = table.fill_row(i, &context);
+            if context.len() == CONTEXT_ROWS {
+                context.remove(0);
+            }
+            context.push(row);
+        }
+        table
+    }
 
-            for k in 1..=MAX_MOVE_SWAP {
-                if i >= 1 + k && j >= 1 + k {
-                    if s_pitches[i - 1] == t_pitches[j - 1 - k]
-                        && s_pitches[i - 1 - k] == t_pitches[j - 1]
-                    {
-                        best = best.min(dp[[i - 1 - k, j - 1 - k]] + MOVE_SWAP_COST);
+    /// Compute row `i` given the rows directly above it (oldest first).
+    fn fill_row(&self, i: usize, above: &[DpRow]) -> DpRow {
+        let lo = self.lo[i];
+        let mut row = DpRow {
+            lo,
+            cells: Vec::with_capacity(self.hi[i] + 1 - lo),
+        };
+        for j in lo..=self.hi[i] {
+            let value = cell_cost(
+                i,
+                j,
+                self.s_pitches,
+                self.t_pitches,
+                self.insertion_range,
+                self.open_end,
+                |a, b| {
+                    if a == i {
+                        row.get(b)
+                    } else {
+                        above[above.len() - (i - a)].get(b)
                     }
-                }
-            }
+                },
+            );
+            row.cells.push(value as i32);
+        }
+        row
+    }
 
-            dp[[i, j]] = best;
+    fn load_block(&mut self, index: usize) {
+        let start = index * self.block;
+        let end = (start + self.block).min(self.nrows());
+        let mut rows = self.checkpoints[index].clone();
+        self.loaded_start = start - rows.len();
+        for i in start..end {
+            let row = self.fill_row(i, &rows[rows.len().saturating_sub(CONTEXT_ROWS)..]);
+            rows.push(row);
         }
+        self.loaded = rows;
+    }
+}
+
+impl DpTable for CheckpointedTable<'_> {
+    fn nrows(&self) -> usize {
+        self.lo.len()
     }
 
-    backtrack(&dp, s_pitches, t_pitches, insertion_range, m)
+    fn get(&mut self, i: usize, j: usize) -> i64 {
+        if i < self.loaded_start || i >= self.loaded_start + self.loaded.len() {
+            self.load_block(i / self.block);
+        }
+        self.loaded[i - self.loaded_start].get(j)
+    }
 }
 
 fn backtrack(
-    dp: &Array2<i64>,
+    dp: &mut impl DpTable,
     s_pitches: &[i64],
     t_pitches: &[i64],
     insertion_range: Option<(usize, usize)>,
+    open_end: bool,
     m: usize,
 ) -> (Vec<OperationRecord>, Vec<(usize, usize)>, i64) {
     if m == 0 {
@@ -202,7 +1217,7 @@ fn backtrack(
     let mut edits: Vec<OperationRecord> = Vec::new();
 
     let mut i = dp.nrows().checked_sub(1).unwrap_or_default();
-    let min_cost = dp[[i, m]];
+    let min_cost = dp.get(i, m);
     let mut j = m;
 
     while i > 0 && j > 0 {
@@ -212,14 +1227,18 @@ fn backtrack(
             OP_COST
         };
 
-        let delete_cost = if j == m { REDUCED_COST } else { OP_COST };
+        let delete_cost = if open_end && j == m {
+            REDUCED_COST
+        } else {
+            OP_COST
+        };
         let insert_cost = if free_insert(j - 1, insertion_range) {
             REDUCED_COST
         } else {
             OP_COST
         };
 
-        if dp[[i, j]] == dp[[i - 1, j - 1]] + sub_cost {
+        if dp.get(i, j) == dp.get(i - 1, j - 1) + sub_cost {
             aligned_indices.push((i - 1, j - 1));
             if sub_cost != 0 {
                 edits.push(OperationRecord::new(0, i - 1, Some(j - 1), i - 1, j - 1));
@@ -229,7 +1248,7 @@ fn backtrack(
             continue;
         }
 
-        if dp[[i, j]] == dp[[i - 1, j]] + delete_cost {
+        if dp.get(i, j) == dp.get(i - 1, j) + delete_cost {
             if delete_cost != 0 {
                 edits.push(OperationRecord::new(1, i - 1, None, i - 1, j));
             }
@@ -237,7 +1256,7 @@ fn backtrack(
             continue;
         }
 
-        if dp[[i, j]] == dp[[i, j - 1]] + insert_cost {
+        if dp.get(i, j) == dp.get(i, j - 1) + insert_cost {
             if insert_cost != 0 {
                 edits.push(OperationRecord::new(2, i - 1, Some(j - 1), i, j - 1));
             }
@@ -247,7 +1266,7 @@ fn backtrack(
 
         let mut moved = false;
         for k in 1..=MAX_MOVE_SWAP {
-            if j >= 1 + k && dp[[i, j]] == dp[[i - 1, j - 1 - k]] + MOVE_SWAP_COST {
+            if j >= 1 + k && dp.get(i, j) == dp.get(i - 1, j - 1 - k) + MOVE_SWAP_COST {
                 aligned_indices.push((i - 1, j - 1 - k));
                 i -= 1;
                 j -= 1 + k;
@@ -260,7 +1279,7 @@ fn backtrack(
         }
 
         for k in 1..=MAX_MOVE_SWAP {
-            if j + k <= m && dp[[i, j]] == dp[[i - 1, j + k]] + MOVE_SWAP_COST {
+            if j + k <= m && dp.get(i, j) == dp.get(i - 1, j + k) + MOVE_SWAP_COST {
                 aligned_indices.push((i - 1, j + k));
                 i -= 1;
                 j += k;
@@ -276,7 +1295,7 @@ fn backtrack(
         for k in 1..=MAX_MOVE_SWAP {
             if i >= 1 + k
                 && j >= 1 + k
-                && dp[[i, j]] == dp[[i - 1 - k, j - 1 - k]] + MOVE_SWAP_COST
+                && dp.get(i, j) == dp.get(i - 1 - k, j - 1 - k) + MOVE_SWAP_COST
                 && s_pitches[i - 1] == t_pitches[j - 1 - k]
                 && s_pitches[i - 1 - k] == t_pitches[j - 1]
             {
@@ -296,14 +1315,14 @@ fn backtrack(
     }
 
     while j > 0 {
-        if dp[[i, j]] != dp[[i, j - 1]] {
+        if dp.get(i, j) != dp.get(i, j - 1) {
             edits.push(OperationRecord::new(2, j - 1, Some(j - 1), 0, j - 1));
         }
         j -= 1;
     }
 
     while i > 0 {
-        if dp[[i, j]] != dp[[i - 1, j]] {
+        if dp.get(i, j) != dp.get(i - 1, j) {
             edits.push(OperationRecord::new(1, i - 1, None, i - 1, j));
         }
         i -= 1;
@@ -336,6 +1355,25 @@ pub fn analyze_tempo_py(
     ))
 }
 
+/// NumPy variant of `analyze_tempo`: reads contiguous float32 time arrays in
+/// place and takes the aligned pairs as an `(p, 2)` int64 array. The GIL is
+/// released during the segmentation.
+#[pyfunction(signature = (actual_times, played_times, aligned, params=None))]
+#[pyo3(name = "analyze_tempo_array")]
+pub fn analyze_tempo_array_py<'py>(
+    py: Python<'py>,
+    actual_times: PyReadonlyArray1<'py, f32>,
+    played_times: PyReadonlyArray1<'py, f32>,
+    aligned: PyReadonlyArray2<'py, i64>,
+    params: Option<TempoSegmentationParams>,
+) -> PyResult<(Vec<(usize, usize, f32)>, f32)> {
+    let params = params.unwrap_or_default();
+    let aligned = pairs_from_array(aligned.as_array())?;
+    let actual_times = actual_times.as_slice()?;
+    let played_times = played_times.as_slice()?;
+    Ok(py.detach(|| analyze_tempo(actual_times, played_times, &aligned, &params)))
+}
+
 fn analyze_tempo(
     actual_times: &[f32],
     played_times: &[f32],
@@ -428,6 +1466,45 @@ fn segmented_regression(
         prefix_sq[i + 1] = prefix_sq[i] + val * val;
     }
 
+    let prev = if params.max_segments.is_none() && params.algorithm != EXHAUSTIVE {
+        pruned_partition(&prefix_sum, &prefix_sq, min_len, params.penalty as f64)
+    } else {
+        exhaustive_partition(&prefix_sum, &prefix_sq, min_len, params)
+    };
+
+    if prev[n].is_none() {
+        return vec![(0, n)];
+    }
+
+    let mut segments = Vec::new();
+    let mut idx = n;
+    while let Some(start) = prev[idx] {
+        segments.push((start, idx));
+        if start == 0 {
+            break;
+        }
+        idx = start;
+        if prev[idx].is_none() && idx != 0 {
+            // Fallback: segmentation stalled, bail out with a single segment.
+            return vec![(0, n)];
+        }
+    }
+    segments.reverse();
+    if segments.is_empty() {
+        segments.push((0, n));
+    }
+    segments
+}
+
+/// Optimal partitioning over every `(start, end)` pair, O(n²). For each end the
+/// largest start among equally cheap ones wins.
+fn exhaustive_partition(
+    prefix_sum: &[f64],
+    prefix_sq: &[f64],
+    min_len: usize,
+    params: &TempoSegmentationParams,
+) -> Vec<Option<usize>> {
+    let n = prefix_sum.len() - 1;
     let mut dp = vec![f64::INFINITY; n + 1];
     let mut prev: Vec<Option<usize>> = vec![None; n + 1];
     let mut seg_counts: Vec<Option<usize>> = vec![None; n + 1];
@@ -450,9 +1527,8 @@ fn segmented_regression(
                     continue;
                 }
             }
-            let cost = dp[start]
-                + segment_cost(&prefix_sum, &prefix_sq, start, end)
-                + params.penalty as f64;
+            let cost =
+                dp[start] + segment_cost(prefix_sum, prefix_sq, start, end) + params.penalty as f64;
             if cost < dp[end] {
                 dp[end] = cost;
                 prev[end] = Some(start);
@@ -460,29 +1536,79 @@ fn segmented_regression(
             }
         }
     }
+    prev
+}
 
-    if prev[n].is_none() {
-        return vec![(0, n)];
-    }
+/// Relative slack before a start is pruned, so rounding never prunes a start
+/// the exhaustive search would pick.
+const PRUNE_TOLERANCE: f64 = 1e-9;
 
-    let mut segments = Vec::new();
-    let mut idx = n;
-    while let Some(start) = prev[idx] {
-        segments.push((start, idx));
-        if start == 0 {
-            break;
+/// A start still in the running, with the range of segment means `lo..hi` for
+/// which it beats every later start.
+struct PrunedStart {
+    start: usize,
+    lo: f64,
+    hi: f64,
+}
+
+/// Same partition as `exhaustive_partition` (without `max_segments`), found by
+/// PELT-style pruning in near-linear time.
+///
+/// For a segment mean `mu`, start `s` costs `dp[s] + sum((x - mu)^2) + penalty`
+/// up to any end, and its advantage over a later start `t` only depends on
+/// `s..t`: `s` wins iff `dp[s] + sum_{s..t}((x - mu)^2) < dp[t]`, an interval of
+/// `mu`. A start whose intervals against all later starts no longer intersect
+/// can never be picked again and is dropped. When the interval is empty this is
+/// the plain PELT rule. Starts are only added once they are a full
+/// `min_len` before the end, so no comparison uses a start that is not allowed yet.
+fn pruned_partition(
+    prefix_sum: &[f64],
+    prefix_sq: &[f64],
+    min_len: usize,
+    penalty: f64,
+) -> Vec<Option<usize>> {
+    let n = prefix_sum.len() - 1;
+    let mut dp = vec![f64::INFINITY; n + 1];
+    let mut prev: Vec<Option<usize>> = vec![None; n + 1];
+    dp[0] = 0.0;
+
+    let mut candidates: Vec<PrunedStart> = Vec::new();
+    for end in min_len..=n {
+        let newest = end - min_len;
+        if dp[newest].is_finite() {
+            let tolerance = PRUNE_TOLERANCE * (1.0 + dp[newest].abs());
+            candidates.retain_mut(|candidate| {
+                let start = candidate.start;
+                let slack =
+                    dp[newest] - dp[start] - segment_cost(prefix_sum, prefix_sq, start, newest)
+                        + tolerance;
+                if slack <= 0.0 {
+                    return false;
+                }
+                let len = (newest - start) as f64;
+                let mean = (prefix_sum[newest] - prefix_sum[start]) / len;
+                let half_width = (slack / len).sqrt();
+                candidate.lo = candidate.lo.max(mean - half_width);
+                candidate.hi = candidate.hi.min(mean + half_width);
+                candidate.lo < candidate.hi
+            });
+            candidates.push(PrunedStart {
+                start: newest,
+                lo: f64::NEG_INFINITY,
+                hi: f64::INFINITY,
+            });
         }
-        idx = start;
-        if prev[idx].is_none() && idx != 0 {
-            // Fallback: segmentation stalled, bail out with a single segment.
-            return vec![(0, n)];
+
+        for candidate in candidates.iter().rev() {
+            let start = candidate.start;
+            let cost = dp[start] + segment_cost(prefix_sum, prefix_sq, start, end) + penalty;
+            if cost < dp[end] {
+                dp[end] = cost;
+                prev[end] = Some(start);
+            }
         }
     }
-    segments.reverse();
-    if segments.is_empty() {
-        segments.push((0, n));
-    }
-    segments
+    prev
 }
 
 fn segment_cost(prefix_sum: &[f64], prefix_sq: &[f64], start: usize, end: usize) -> f64 {
@@ -535,7 +1661,136 @@ fn build_sections(
 fn scoring_native(_py: Python, m: &Bound<PyModule>) -> PyResult<()> {
     m.add_class::<OperationRecord>()?;
     m.add_class::<TempoSegmentationParams>()?;
+    m.add_class::<StreamingAligner>()?;
     m.add_function(wrap_pyfunction!(edit_dist_py, m)?)?;
+    m.add_function(wrap_pyfunction!(edit_dist_array_py, m)?)?;
+    m.add_function(wrap_pyfunction!(edit_dist_batch_py, m)?)?;
+    m.add_function(wrap_pyfunction!(edit_dist_anchored_array_py, m)?)?;
     m.add_function(wrap_pyfunction!(analyze_tempo_py, m)?)?;
+    m.add_function(wrap_pyfunction!(analyze_tempo_array_py, m)?)?;
     Ok(())
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Every column a `StreamingAligner` produced, with rows up to `rows - 1`.
+    struct StreamedTable {
+        columns: Vec<Vec<i64>>,
+        rows: usize,
+    }
+
+    impl DpTable for StreamedTable {
+        fn nrows(&self) -> usize {
+            self.rows
+        }
+
+        fn get(&mut self, i: usize, j: usize) -> i64 {
+            self.columns.get(j).map_or(UNREACHABLE, |column| column[i])
+        }
+    }
+
+    /// Deterministic pseudo-random numbers, so the test needs no extra crates.
+    struct Lcg(u64);
+
+    impl Lcg {
+        fn below(&mut self, bound: usize) -> usize {
+            self.0 = self
+                .0
+                .wrapping_mul(6364136223846793005)
+                .wrapping_add(1442695040888963407);
+            ((self.0 >> 33) as usize) % bound
+        }
+    }
+
+    /// A stretch of `s` played with dropped, extra and swapped notes.
+    fn played_take(s: &[i64], rng: &mut Lcg) -> Vec<i64> {
+        let mut t = Vec::new();
+        let mut x = rng.below(s.len());
+        while x < s.len() && t.len() < 40 {
+            match rng.below(100) {
+                0..8 => x += 1,
+                8..16 => t.push(60 + rng.below(7) as i64),
+                16..28 if x + 2 < s.len() => {
+                    let k = 1 + rng.below(3.min(s.len() - x - 1));
+                    t.push(s[x + k]);
+                    t.extend_from_slice(&s[x + 1..x + k]);
+                    t.push(s[x]);
+                    x += k + 1;
+                }
+                _ => {
+                    t.push(s[x]);
+                    x += 1;
+                }
+            }
+        }
+        t
+    }
+
+    #[test]
+    fn streamed_matches_follow_backtrack() {
+        let mut rng = Lcg(7);
+        for _ in 0..2000 {
+            let n = 5 + rng.below(36);
+            let s: Vec<i64> = (0..n).map(|_| 60 + rng.below(5) as i64).collect();
+            let t = played_take(&s, &mut rng);
+
+            let mut aligner = StreamingAligner::new(s.clone());
+            let mut columns = vec![aligner.column(0).to_vec()];
+            for (j, &pitch) in t.iter().enumerate() {
+                let (s_index, matched, position, _) = aligner.advance(pitch);
+                columns.push(aligner.column(0).to_vec());
+
+                let mut table = StreamedTable {
+                    columns: columns.clone(),
+                    rows: position + 1,
+                };
+                let (_, aligned, _) = backtrack(&mut table, &s, &t[..=j], None, false, j + 1);
+                let expected = aligned
+                    .iter()
+                    .find(|&&(_, t_index)| t_index == j)
+                    .map(|&(s_index, _)| s_index);
+                assert_eq!(s_index, expected, "s = {s:?}, t = {:?}", &t[..=j]);
+                assert_eq!(matched, expected.is_some_and(|i| s[i] == pitch));
+            }
+        }
+    }
+
+    /// Noisy steps between tempo levels, like smoothed slopes of a real take.
+    fn stepped_slopes(n: usize, rng: &mut Lcg) -> Array1<f32> {
+        let mut slopes = Vec::with_capacity(n);
+        while slopes.len() < n {
+            let level = 0.5 + rng.below(150) as f32 / 100.0;
+            for _ in 0..1 + rng.below(30) {
+                slopes.push(level + (rng.below(1000) as f32 / 1000.0 - 0.5) * 0.2);
+            }
+        }
+        slopes.truncate(n);
+        Array1::from_vec(slopes)
+    }
+
+    #[test]
+    fn pruned_partition_matches_exhaustive() {
+        let mut rng = Lcg(11);
+        for _ in 0..500 {
+            let slopes = stepped_slopes(1 + rng.below(120), &mut rng);
+            let pruned = TempoSegmentationParams {
+                min_segment_length: 1 + rng.below(10),
+                penalty: rng.below(60) as f32 / 10.0,
+                ..TempoSegmentationParams::default()
+            };
+            let exhaustive = TempoSegmentationParams {
+                algorithm: EXHAUSTIVE.to_string(),
+                ..pruned.clone()
+            };
+            assert_eq!(
+                segmented_regression(&slopes, &pruned),
+                segmented_regression(&slopes, &exhaustive),
+                "slopes = {slopes:?}, min_segment_length = {}, penalty = {}",
+                pruned.min_segment_length,
+                pruned.penalty
+            );
+        }
+    }
+}
@@ -1,4 +1,10 @@
+from .startup import import_report
 from .limiter import *
 from .scoring import *
 from .app import app
 from .api import *
+from .api.transport import install_transport
+
+install_transport()
+
+import_report()
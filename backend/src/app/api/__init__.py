@@ -3,12 +3,9 @@ from flask import Blueprint, abort, g
 from loguru import logger
 
 from .util import *
-from .scoring import scoring_bp
+from .scoring import LiveScoringNamespace, scoring_bp
 from .scores import score_bp
 
-admin_client = get_client().set_key(os.environ["APPWRITE_API_KEY"])
-admin_account = Account(admin_client)
-
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 needs_login = Blueprint("needs_login", __name__)
 api_bp.register_blueprint(needs_login)
@@ -16,7 +13,7 @@ api_bp.register_blueprint(needs_login)
 
 def is_logged_in():
     try:
-        g.account = get_user_account().get()
+        g.account = get_account()
     except Exception as e:
         logger.debug("Not logged in: {}", e)
         g.account = None
@@ -32,6 +29,8 @@ def check_login():
 @api_bp.errorhandler(AppwriteException)
 def handle_unauthorized(e):
     if "User (role: guests) missing scope (account)" in str(e):
+        # The JWT no longer works, so stop trusting its cached account.
+        forget_account()
         return {"error": str(e), "needs_login": True}, 401
     if "with the requested ID could not be found." in str(e):
         return {"error": str(e), "not_found": True}, 404
@@ -0,0 +1,46 @@
+import os
+from typing import BinaryIO, Optional
+
+from appwrite.services.storage import Storage
+
+from ..cache import DiskCache, content_key
+
+# Storage files kept on local disk between requests, evicted LRU by total size.
+blob_cache = DiskCache(
+    "blobs", int(os.environ.get("BLOB_CACHE_BYTES", 1024 * 1024 * 1024))
+)
+
+
+def open_file(
+    storage: Storage, bucket_id: str, file_id: str, info: Optional[dict] = None
+) -> tuple[BinaryIO, dict]:
+    """Open the content of a storage file, downloading it only on a cache miss.
+
+    The file's metadata is fetched with ``storage`` on every call (unless the
+    caller already has it as ``info``), so reads stay authorized as that
+    client. Entries are keyed by the metadata's ``$updatedAt`` and signature,
+    so a replaced file is downloaded again. Returns the open file and the
+    metadata; the caller closes the file.
+    """
+    if info is None:
+        info = storage.get_file(bucket_id, file_id)
+    key = content_key(
+        bucket_id, file_id, info["$updatedAt"], info.get("signature") or ""
+    )
+    if (path := blob_cache.path(key)) is not None:
+        try:
+            return open(path, "rb"), info
+        except FileNotFoundError:
+            # Evicted by another process since the lookup.
+            pass
+    path = blob_cache.put(key, storage.get_file_view(bucket_id, file_id))
+    return open(path, "rb"), info
+
+
+def read_file(
+    storage: Storage, bucket_id: str, file_id: str, info: Optional[dict] = None
+) -> bytes:
+    """Content of a storage file, through the local cache as in ``open_file``."""
+    f, _ = open_file(storage, bucket_id, file_id, info)
+    with f:
+        return f.read()
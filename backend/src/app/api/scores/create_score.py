@@ -1,24 +1,21 @@
-import atexit
-import shutil
-import tempfile
+import time
 import uuid
-from datetime import datetime, timedelta
+from concurrent.futures import Future, wait
 from threading import Thread
 from time import sleep
 
 from appwrite.role import Role
 from appwrite.services.storage import Storage
-from flask import Response
+from flask import Response, send_file
 from werkzeug.utils import secure_filename
 
 from ...rendering import score_preview
+from ..blobs import open_file
+from ..sessions import UPLOAD_FOLDER, UploadEntry, uploads
 from . import score_bp
 from .process_scores import *
 
 
-TEMP_UPLOAD_FOLDER = tempfile.mkdtemp()
-
-
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in allowed_extensions
 
@@ -26,34 +23,32 @@ def allowed_file(filename):
 @score_bp.route("/cancel-upload", methods=["POST"])
 def cancel_upload():
     file_name = request.form.get("file_name")
-    found = False
-    session_files = data.get(request.cookies["appwrite-session"], [])
-    for entry in session_files:
-        if entry[3] == file_name:
-            try:
-                os.remove(entry[0])
-            except Exception as e:
-                logger.error(f"Error deleting temporary file {entry[0]}: {e}")
-            session_files.remove(entry)
-            found = True
-            break
-    return {"success": found}
+    entry = uploads.remove(request.cookies["appwrite-session"], file_name)
+    if entry is not None:
+        try:
+            os.remove(entry.path)
+        except Exception as e:
+            logger.error(f"Error deleting temporary file {entry.path}: {e}")
+    return {"success": entry is not None}
 
 
 @score_bp.route("/download/<score_id>", methods=["GET"])
 def download_score(score_id):
     """Download a music XML file in binary format."""
+    no_cache = {
+        "Cache-Control": "no-cache, no-store, must-revalidate",
+        "Pragma": "no-cache",
+        "Expires": "0",
+    }
     try:
         storage = Storage(get_user_client())
 
-        file_bytes = storage.get_file_view(scores_bucket, score_id)
-
-        file_info = storage.get_file(scores_bucket, score_id)
+        score_file, file_info = open_file(storage, scores_bucket, score_id)
         filename = file_info.get("name", "score.xml")
 
         if filename.lower().endswith((".mxl", ".zip")):
             try:
-                with zipfile.ZipFile(io.BytesIO(file_bytes), "r") as zip_file:
+                with score_file, zipfile.ZipFile(score_file, "r") as zip_file:
                     xml_files = [f for f in zip_file.namelist() if f.endswith(".xml")]
                     if xml_files:
                         xml_content = zip_file.read(xml_files[0])
@@ -62,9 +57,7 @@ def download_score(score_id):
                             mimetype="application/xml",
                             headers={
                                 "Content-Disposition": f'attachment; filename="{score_id}.xml"',
-                                "Cache-Control": "no-cache, no-store, must-revalidate",
-                                "Pragma": "no-cache",
-                                "Expires": "0",
+                                **no_cache,
                             },
                         )
                     else:
@@ -72,16 +65,16 @@ def download_score(score_id):
             except zipfile.BadZipFile:
                 return {"error": "Invalid compressed file format"}, 400
         else:
-            return Response(
-                file_bytes,
+            # Streamed from the cached file, with sendfile where the server has it.
+            response = send_file(
+                score_file,
                 mimetype="application/xml",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"',
-                    "Cache-Control": "no-cache, no-store, must-revalidate",
-                    "Pragma": "no-cache",
-                    "Expires": "0",
-                },
+                as_attachment=True,
+                download_name=filename,
+                etag=False,
             )
+            response.headers.update(no_cache)
+            return response
 
     except Exception as e:
         logger.error(f"Error downloading score {score_id}: {e}")
@@ -90,6 +83,8 @@ def download_score(score_id):
 
 @score_bp.route("/upload", methods=["POST"])
 def upload():
+    # Checked while the body is parsed, before the file is written to disk.
+    request.max_content_length = MAX_UPLOAD_BYTES
     file = request.files.get("file")
     if not file:
         return {"error": "No file provided"}, 400
@@ -100,32 +95,30 @@ def upload():
     original_filename = secure_filename(file.filename)
 
     unique_filename = f"{uuid.uuid4().hex}_{original_filename}"
-    temp_filepath = os.path.join(TEMP_UPLOAD_FOLDER, unique_filename)
+    temp_filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
 
     file.save(temp_filepath)
+    uploads.add(
+        request.cookies["appwrite-session"],
+        UploadEntry(
+            temp_filepath,
+            time.time(),
+            original_filename.rsplit(".", 1)[-1].lower(),
+            original_filename,
+            file.mimetype,
+        ),
+    )
 
-    logger.info("Data cache length:", sum(len(arr) for arr in data.values()))
+    logger.info(f"Pending uploads: {uploads.count()}")
 
     return {"success": True}, 201
 
 
-def process_document(
-    file_bytes, score_files, filename, doc_id, db: Databases, storage: Storage, user
-):
+def process_document(preview: Future, doc_id, db: Databases, storage: Storage, user):
     """
-    Process the document to generate a preview image
+    Upload the preview image rendered by ``preview`` and attach it to the document
     """
-    if not file_bytes:
-        raise Exception("No file provided")
-
-    preview_bytes = file_bytes
-    preview_filename = filename
-    if len(score_files) > 1:
-        with open(score_files[0][0], "rb") as f:
-            preview_bytes = f.read()
-            preview_filename = score_files[0][3]
-
-    preview_image_bytes, filename = score_preview(preview_bytes, preview_filename)
+    preview_image_bytes, filename = preview.result()
     result = storage.create_file(
         bucket_id=os.environ["IMAGES_BUCKET"],
         file_id="unique()",
@@ -145,10 +138,23 @@ def process_document(
     )
 
 
+def log_failure(future: Future):
+    if (exc := future.exception()) is not None:
+        logger.opt(exception=exc).error(f"Upload processing failed: {exc}")
+
+
 @score_bp.route("/confirm-upload", methods=["POST"])
 def confirm_upload():
-    storage = Storage(get_user_client())
-    file_data = data.get(request.cookies["appwrite-session"])
+    """Store the session's uploads and create the score document.
+
+    Both uploads and the preview render run concurrently on ``io_executor``,
+    sharing one client; the document is created as soon as both uploads are
+    done, and the preview is attached to it in the background.
+    """
+    client = get_user_client()
+    storage = Storage(client)
+    db = Databases(client)
+    file_data = uploads.get(request.cookies["appwrite-session"])
 
     if not file_data:
         return {"error": "No file provided"}, 400
@@ -162,11 +168,23 @@ def confirm_upload():
 
     apply_ref_order(score_files, request.json["ref_order"])
 
-    score_bytes, score_filename, score_mimetype = process_score_files(score_files)
-    audio_file_ids = upload_audio_files(audio_files, storage, user)
-    score_file_id = upload_score_file(
-        score_bytes, score_filename, score_mimetype, storage, user
+    # The preview is rendered from the first page only.
+    with open(score_files[0][0], "rb") as f:
+        preview = io_executor.submit(score_preview, f.read(), score_files[0][3])
+
+    score_path, score_filename, score_mimetype = process_score_files(score_files)
+    audio_upload = io_executor.submit(upload_audio_files, audio_files, storage, user)
+    score_upload = io_executor.submit(
+        upload_score_file, score_path, score_filename, score_mimetype, storage, user
     )
+    try:
+        audio_file_ids = audio_upload.result()
+        score_file_id = score_upload.result()
+    finally:
+        # The zip has to outlive both uploads, even if one of them failed.
+        wait([audio_upload, score_upload])
+        if len(score_files) > 1:
+            os.remove(score_path)
 
     ext = score_files[0][3].split(".")[-1]
     db_result = create_score_document(
@@ -176,35 +194,23 @@ def confirm_upload():
         request.json["title"],
         request.json["subtitle"],
         user,
+        db,
     )
 
-    Thread(
-        name=f"Process {score_filename}",
-        target=process_document,
-        args=(
-            score_bytes,
-            score_files,
-            score_filename,
-            db_result["$id"],
-            Databases(get_user_client()),
-            storage,
-            user,
-        ),
-        daemon=True,
-    ).start()
+    io_executor.submit(
+        process_document, preview, db_result["$id"], db, storage, user
+    ).add_done_callback(log_failure)
 
     Thread(
         name="Process Models",
         target=run_models,
-        args=(
-            score_files,
-            audio_files,
-            request.cookies["appwrite-session"],
-            storage,
-            Databases(get_user_client()),
-            db_result["$id"],
-            score_filename,
-            user,
+        kwargs=dict(
+            score_files=score_files,
+            cookie=request.cookies["appwrite-session"],
+            storage=storage,
+            score_filename=score_filename,
+            user=user,
+            audio_files=audio_files,
         ),
         daemon=True,
     ).start()
@@ -212,27 +218,16 @@ def confirm_upload():
     return {"success": True}, 201
 
 
-def cleanup_temp(interval=15 * 60):
-    """Periodically clean up temporary files older than 15 minutes."""
+def cleanup_temp(interval=60):
+    """Periodically delete uploads that were not confirmed in time."""
     while True:
-        current_time = datetime.now()
-        for cookie in list(data.keys()):
-            new_list = []
-            for entry in data[cookie]:
-                temp_filepath, file_time, file_type, original_filename, content_type = (
-                    entry
-                )
-                if current_time - file_time > timedelta(minutes=15):
-                    try:
-                        os.remove(temp_filepath)
-                    except Exception as e:
-                        logger.error(f"Error deleting file {temp_filepath}: {e}")
-                else:
-                    new_list.append(entry)
-            if new_list:
-                data[cookie] = new_list
-            else:
-                del data[cookie]
+        for entry in uploads.expire():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error deleting file {entry.path}: {e}")
         sleep(interval)
 
 
@@ -241,4 +236,3 @@ if not ran:
     ran = True
     cleanup_thread = Thread(target=cleanup_temp, daemon=True)
     cleanup_thread.start()
-    atexit.register(lambda: shutil.rmtree(TEMP_UPLOAD_FOLDER))
@@ -1,5 +1,5 @@
 import asyncio
-import io
+import tempfile
 import zipfile
 from traceback import print_exc
 
@@ -10,6 +10,7 @@ from appwrite.services.databases import Databases
 from flask import g, session
 from loguru import logger
 
+from ..sessions import uploads
 from .run_models import process_models
 
 
@@ -30,20 +31,32 @@ def apply_ref_order(score_files, ref_order):
     score_files.sort(key=lambda entry: order_map.get(entry[3], float("inf")))
 
 
+def input_file(path, filename, mime_type=None) -> InputFile:
+    """InputFile the Appwrite SDK uploads from ``path`` chunk by chunk."""
+    file = InputFile.from_path(path)
+    file.filename = filename
+    file.mime_type = mime_type
+    return file
+
+
 def process_score_files(score_files):
+    """Path, name and MIME type of the file to store for ``score_files``.
+
+    Several files are zipped into a new file next to the uploads, which the
+    caller removes once it is stored.
+    """
     if not score_files:
         return None, None, None
     if len(score_files) > 1:
-        score_bytes = create_zip([(entry[0], entry[3]) for entry in score_files])
+        score_path = create_zip([(entry[0], entry[3]) for entry in score_files])
         score_filename = f"{session.get('score_doc_id', 'document')}.zip"
         score_mimetype = "application/zip"
     else:
         entry = score_files[0]
-        with open(entry[0], "rb") as f:
-            score_bytes = f.read()
+        score_path = entry[0]
         score_filename = entry[3]
         score_mimetype = entry[4]
-    return score_bytes, score_filename, score_mimetype
+    return score_path, score_filename, score_mimetype
 
 
 def upload_audio_files(audio_files, storage, user):
@@ -51,12 +64,10 @@ def upload_audio_files(audio_files, storage, user):
     if not audio_files:
         return audio_file_ids
     entry = audio_files[0]
-    with open(entry[0], "rb") as f:
-        audio_bytes = f.read()
     result = storage.create_file(
         bucket_id=misc_bucket,
         file_id="unique()",
-        file=InputFile.from_bytes(audio_bytes, entry[3], entry[4]),
+        file=input_file(entry[0], entry[3], entry[4]),
         permissions=[
             Permission.read(user),
             Permission.write(user),
@@ -67,15 +78,15 @@ def upload_audio_files(audio_files, storage, user):
     return audio_file_ids
 
 
-def upload_score_file(score_bytes, score_filename, score_mimetype, storage, user):
-    if score_bytes is None:
+def upload_score_file(score_path, score_filename, score_mimetype, storage, user):
+    if score_path is None:
         return None
 
-    logger.info(f"File size: {len(score_bytes) / 1024 / 1024:.2f} MB")
+    logger.info(f"File size: {os.path.getsize(score_path) / 1024 / 1024:.2f} MB")
     result = storage.create_file(
         bucket_id=scores_bucket,
         file_id="unique()",
-        file=InputFile.from_bytes(score_bytes, score_filename, score_mimetype),
+        file=input_file(score_path, score_filename, score_mimetype),
         permissions=[
             Permission.read(user),
             Permission.write(user),
@@ -86,9 +97,9 @@ def upload_score_file(score_bytes, score_filename, score_mimetype, storage, user
 
 
 def create_score_document(
-    score_file_id, audio_file_ids, mimetype, title, subtitle, user
+    score_file_id, audio_file_ids, mimetype, title, subtitle, user, db=None
 ):
-    db = Databases(get_user_client())
+    db = db or Databases(get_user_client())
     document_data = {
         "user_id": g.account["$id"],
         "name": title,
@@ -114,17 +125,16 @@ def create_score_document(
 
 def create_zip(files):
     """
-    Creates a ZIP file containing all files in the given list.
+    Creates a ZIP file containing all files in the given list and returns its path.
     Each element in files is a tuple: (file_path, original_filename)
+    Files are streamed into the archive, which is written next to the first one.
     """
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-        for i, (file_path, original_filename) in enumerate(files):
-            with open(file_path, "rb") as f:
-                file_data = f.read()
-            zipf.writestr(original_filename, file_data)
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
+    fd, zip_path = tempfile.mkstemp(suffix=".zip", dir=os.path.dirname(files[0][0]))
+    with os.fdopen(fd, "wb") as zip_file:
+        with zipfile.ZipFile(zip_file, "w", zipfile.ZIP_DEFLATED) as zipf:
+            for file_path, original_filename in files:
+                zipf.write(file_path, original_filename)
+    return zip_path
 
 
 def run_models(score_files, cookie, storage, score_filename, user, audio_files=None):
@@ -142,10 +152,8 @@ def run_models(score_files, cookie, storage, score_filename, user, audio_files=N
         logger.info("Error running models:", ex)
         print_exc()
     finally:
-        for entry in data.get(cookie, []):
+        for entry in uploads.pop(cookie):
             try:
-                os.remove(entry[0])
+                os.remove(entry.path)
             except Exception as e:
-                logger.info(f"Error deleting temporary file {entry[0]}: {e}")
-        if cookie in data:
-            del data[cookie]
+                logger.info(f"Error deleting temporary file {entry.path}: {e}")
@@ -1,24 +1,39 @@
 import asyncio
 import base64
+import hashlib
 import json
 import os
+import threading
 from functools import lru_cache
 from traceback import print_exc
+from typing import TYPE_CHECKING
 
 from ..util import misc_bucket
+from ...cache import DiskCache, content_key
 from appwrite.input_file import InputFile
 from appwrite.permission import Permission
-from beam import Client
-from beam.client.client import Task
 from loguru import logger
 
+if TYPE_CHECKING:
+    from beam import Client
+
+# Model outputs by input bytes, so re-uploaded pages and recordings skip Beam.
+model_cache = DiskCache(
+    "models", int(os.environ.get("MODEL_CACHE_BYTES", 512 * 1024 * 1024))
+)
+# Beam requests in flight across all uploads, to stay within provider limits.
+BEAM_MAX_IN_FLIGHT = int(os.environ.get("BEAM_MAX_IN_FLIGHT", 4))
+_in_flight = threading.BoundedSemaphore(BEAM_MAX_IN_FLIGHT)
+
 
 class BeamConfigError(RuntimeError):
     """Configuration error for Beam deployments."""
 
 
 @lru_cache(maxsize=1)
-def _get_beam_client() -> Client:
+def _get_beam_client() -> "Client":
+    from beam import Client
+
     token = os.environ.get("BEAM_TOKEN")
     if not token:
         raise BeamConfigError(
@@ -35,48 +50,142 @@ def _get_deployment(env_key: str) -> str:
 
 
 def _run_beam_task_sync(deployment: str, payload: dict):
+    from beam.client.client import Task
+
     client = _get_beam_client()
-    submission = client.submit(deployment, input=payload)
-    if isinstance(submission, Task):
-        return submission.result(wait=True)
-    return submission
+    with _in_flight:
+        submission = client.submit(deployment, input=payload)
+        if isinstance(submission, Task):
+            return submission.result(wait=True)
+        return submission
 
 
 async def _run_beam_task(deployment: str, payload: dict):
     return await asyncio.to_thread(_run_beam_task_sync, deployment, payload)
 
 
+def _batch_size(env_key: str) -> int:
+    return max(1, int(os.environ.get(f"{env_key}_BATCH_SIZE", 1)))
+
+
+async def _run_batch(deployment: str, field: str, batch: list[bytes]) -> list:
+    """One Beam request for ``batch``.
+
+    A single input is sent as ``{field: data}``; larger batches as
+    ``{field + "s": [data, ...]}``, answered by a list of results (or a dict
+    holding it under ``results``) in input order.
+    """
+    encoded = [base64.b64encode(data).decode("utf-8") for data in batch]
+    if len(encoded) == 1:
+        return [await _run_beam_task(deployment, {field: encoded[0]})]
+
+    output = await _run_beam_task(deployment, {f"{field}s": encoded})
+    results = output.get("results") if isinstance(output, dict) else output
+    if not isinstance(results, list) or len(results) != len(batch):
+        raise ValueError(
+            f"{deployment} returned {type(output).__name__} for a batch of {len(batch)}"
+        )
+    return results
+
+
+async def _run_model(env_key: str, field: str, inputs: list[bytes]) -> list:
+    """Run the deployment in ``env_key`` on every input, results in input order.
+
+    Results are cached by the SHA-256 of each input together with the
+    deployment and its ``<env_key>_VERSION``, so bump that to drop old outputs.
+    Identical inputs, such as the same page scanned twice, are sent once; the
+    remaining distinct inputs go ``<env_key>_BATCH_SIZE`` per request.
+    """
+    if not inputs:
+        return []
+    deployment = _get_deployment(env_key)
+    version = os.environ.get(f"{env_key}_VERSION", "")
+    keys = [
+        content_key(deployment, version, field, hashlib.sha256(data).digest())
+        for data in inputs
+    ]
+
+    results = [None] * len(inputs)
+    # Indices of the inputs missing from the cache, by key.
+    pending: dict[str, list[int]] = {}
+    for idx, key in enumerate(keys):
+        if key in pending:
+            pending[key].append(idx)
+        elif (cached := model_cache.get(key)) is not None:
+            results[idx] = json.loads(cached)
+        else:
+            pending[key] = [idx]
+    missing = sum(len(indices) for indices in pending.values())
+    if missing < len(inputs):
+        logger.info(
+            f"Using cached {deployment} output for {len(inputs) - missing} "
+            f"of {len(inputs)} inputs"
+        )
+    if len(pending) < missing:
+        logger.info(f"Sending {len(pending)} distinct of {missing} {field} inputs")
+
+    groups = list(pending.values())
+    size = _batch_size(env_key)
+    batches = [groups[i : i + size] for i in range(0, len(groups), size)]
+    async with asyncio.TaskGroup() as tg:
+        tasks = [
+            tg.create_task(
+                _run_batch(deployment, field, [inputs[group[0]] for group in batch])
+            )
+            for batch in batches
+        ]
+
+    for batch, task in zip(batches, tasks):
+        for group, result in zip(batch, task.result()):
+            if result is None:
+                continue
+            encoded = json.dumps(result).encode("utf-8")
+            model_cache.put(keys[group[0]], encoded)
+            results[group[0]] = result
+            # Copies, since page results are tagged in place.
+            for idx in group[1:]:
+                results[idx] = json.loads(encoded)
+    return results
+
+
+def _read_files(entries) -> list[bytes]:
+    contents = []
+    for entry in entries:
+        with open(entry[0], "rb") as f:
+            contents.append(f.read())
+    return contents
+
+
+def _tag_page(result, page: int):
+    """Set ``page`` on the note dicts of a page result, bare or under ``notes``."""
+    notes = result.get("notes") if isinstance(result, dict) else result
+    if isinstance(notes, list):
+        for note in notes:
+            if isinstance(note, dict):
+                note["page"] = page
+    return result
+
+
 async def run_oemer_predictions(image_files):
     """
     Runs OEMER predictions asynchronously for all image files.
 
     Args:
-        image_files: List of tuples containing image file information
+        image_files: List of tuples containing image file information, one per
+            page in page order
 
     Returns:
-        List of combined notes from all OEMER predictions
+        List of combined notes from all OEMER predictions, tagged with their page
     """
     notes_oemer = []
     if not image_files:
         return notes_oemer
 
-    deployment = _get_deployment("OEMER_DEPLOYMENT")
-
-    async with asyncio.TaskGroup() as tg:
-        tasks = []
-        for entry in image_files:
-            with open(entry[0], "rb") as f:
-                image_bytes = f.read()
-            encoded_image = base64.b64encode(image_bytes).decode("utf-8")
-            tasks.append(
-                tg.create_task(_run_beam_task(deployment, {"image": encoded_image}))
-            )
-
-    results = [task.result() for task in tasks]
+    results = await _run_model("OEMER_DEPLOYMENT", "image", _read_files(image_files))
 
-    for result in results:
+    for page, result in enumerate(results):
         if isinstance(result, dict) and "notes" in result:
-            notes_oemer.extend(result["notes"])
+            notes_oemer.extend(_tag_page(result, page)["notes"])
 
     if os.environ.get("DEBUG") == "True":
         with open("scores/last_oemer.json", "w") as f:
@@ -90,11 +199,12 @@ async def run_transkun_predictions(image_files, audio_files=None):
     Runs transkun predictions asynchronously for all image and audio files.
 
     Args:
-        image_files: List of tuples containing image file information
+        image_files: List of tuples containing image file information, one per
+            page in page order
         audio_files: List of tuples containing audio file information
 
     Returns:
-        List of outputs from all transkun predictions
+        List of outputs from all transkun predictions, pages first
     """
     if audio_files is None:
         audio_files = []
@@ -102,28 +212,18 @@ async def run_transkun_predictions(image_files, audio_files=None):
     if not image_files and not audio_files:
         return []
 
-    deployment = _get_deployment("TRANSKUN_DEPLOYMENT")
-
     async with asyncio.TaskGroup() as tg:
-        tasks = []
-
-        for entry in image_files:
-            with open(entry[0], "rb") as f:
-                image_bytes = f.read()
-            encoded_image = base64.b64encode(image_bytes).decode("utf-8")
-            tasks.append(
-                tg.create_task(_run_beam_task(deployment, {"image": encoded_image}))
-            )
-
-        for entry in audio_files:
-            with open(entry[0], "rb") as f:
-                audio_bytes = f.read()
-            encoded_audio = base64.b64encode(audio_bytes).decode("utf-8")
-            tasks.append(
-                tg.create_task(_run_beam_task(deployment, {"audio": encoded_audio}))
-            )
+        image_task = tg.create_task(
+            _run_model("TRANSKUN_DEPLOYMENT", "image", _read_files(image_files))
+        )
+        audio_task = tg.create_task(
+            _run_model("TRANSKUN_DEPLOYMENT", "audio", _read_files(audio_files))
+        )
 
-    results = [task.result() for task in tasks]
+    results = [
+        _tag_page(result, page) for page, result in enumerate(image_task.result())
+    ]
+    results.extend(audio_task.result())
 
     if os.environ.get("DEBUG") == "True":
         with open("scores/last_transkun.json", "w") as f:
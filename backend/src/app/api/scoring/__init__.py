@@ -4,5 +4,6 @@ scoring_bp = Blueprint("score_scoring", __name__, url_prefix="/score")
 
 from . import audio
 from . import recording
+from .live import LiveScoringNamespace
 
-__all__ = ["scoring_bp"]
+__all__ = ["scoring_bp", "LiveScoringNamespace"]
@@ -3,19 +3,16 @@ import mimetypes
 import os
 import re
 import sys
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from functools import lru_cache
 from traceback import print_exc
 from typing import Optional
 
-import magic
 from appwrite.input_file import InputFile
 from appwrite.permission import Permission
 from appwrite.role import Role
 from appwrite.services.databases import Databases
 from appwrite.services.storage import Storage
-from beam import Image, endpoint
 from flask import Response, g, request
 from google.protobuf.message import DecodeError
 
@@ -24,15 +21,22 @@ from google.protobuf.timestamp_pb2 import Timestamp
 from loguru import logger
 
 from ... import (
-    Note,
+    CompiledReference,
     NoteList,
     Recording,
+    RecordingList,
+    ScoringResult,
     analyze_tempo,
+    compile_reference,
     extract_midi_notes,
-    find_edit_ops,
+    note_times,
 )
-from ..util import pitch_name
+from ...cache import TTLCache
+from ..blobs import read_file
+from ..util import _get_jwt, get_admin_client, pitch_name
 from . import scoring_bp
+from .jobs import ScoringJob, get_job, submit_job, wants_async
+from .transcription import transcribe
 from .. import get_user_client, misc_bucket, database
 
 test_cfg = {
@@ -51,138 +55,229 @@ test_cfg = {
 }
 
 NOTE_EXTENSION = 15
+ALIGNMENT_BAND = int(os.environ.get("ALIGNMENT_BAND", 0)) or None
+# Anchor length for unwindowed alignments of long takes; 0 keeps the full DP.
+ALIGNMENT_ANCHOR_LENGTH = int(os.environ.get("ALIGNMENT_ANCHOR_LENGTH", 0)) or None
+# Takes longer than this are aligned against the whole score instead of located.
+LOCATE_MAX_NOTES = 256
+MAX_BATCH_TAKES = 32
+# Memory and lifetime of compiled reference scores kept between requests.
+REFERENCE_CACHE_BYTES = int(os.environ.get("REFERENCE_CACHE_BYTES", 256 * 1024 * 1024))
+REFERENCE_CACHE_TTL_SECONDS = float(os.environ.get("REFERENCE_CACHE_TTL_SECONDS", 600))
 
+# Compiled references by notes id and file version.
+reference_cache = TTLCache(1024, REFERENCE_CACHE_TTL_SECONDS, REFERENCE_CACHE_BYTES)
 
-@lru_cache(maxsize=16)
-def load_notes(notes_id) -> NoteList:
-    if os.environ.get("DEBUG") == "True":
-        if os.path.exists(audio_path := f"resources/audio/{notes_id}"):
-            return extract_midi_notes(audio_path)
-
-        if os.path.exists(notes_path := f"resources/scores/{notes_id}"):
-            with open(notes_path, "rb") as f:
-                notes = NoteList()
-                notes.ParseFromString(f.read())
-            for idx, n in enumerate(notes.notes):
-                n.id = idx
-            return notes
-
-        logger.info(
-            f"Neither path of {audio_path} and {notes_path} exists, fetching from Appwrite"
-        )
 
-    byte_content = Storage(get_user_client()).get_file_view(misc_bucket, notes_id)
+def _parse_notes(byte_content: bytes) -> NoteList:
     (notes := NoteList()).ParseFromString(byte_content)
     for idx, n in enumerate(notes.notes):
         n.id = idx
     return notes
 
 
-@endpoint(
-    gpu="T4",
-    keep_warm_seconds=100,
-    app=os.environ.get("APP_NAME"),
-    image=Image(python_packages=["git+https://github.com/orangishcat/transkun"]),
-)
-def beam_transkun(audio_bytes):
-    """Run Transkun on audio bytes and return NoteList."""
+def _load_debug_notes(notes_id) -> Optional[NoteList]:
+    """Notes from ``resources`` in debug mode, or None to fetch them from Appwrite."""
+    if os.environ.get("DEBUG") != "True":
+        return None
+    if os.path.exists(audio_path := f"resources/audio/{notes_id}"):
+        return extract_midi_notes(audio_path)
+
+    if os.path.exists(notes_path := f"resources/scores/{notes_id}"):
+        with open(notes_path, "rb") as f:
+            return _parse_notes(f.read())
+
+    logger.info(
+        f"Neither path of {audio_path} and {notes_path} exists, fetching from Appwrite"
+    )
+    return None
+
+
+def load_notes(notes_id, jwt: Optional[str] = None) -> NoteList:
+    if (notes := _load_debug_notes(notes_id)) is not None:
+        return notes
+    storage = Storage(get_user_client(jwt))
+    return _parse_notes(read_file(storage, misc_bucket, notes_id))
 
-    # noinspection PyUnresolvedReferences
-    from transkun.predict_return_notes import predict
 
-    return predict(audio_bytes)
+def load_reference(notes_id, jwt: Optional[str] = None) -> CompiledReference:
+    """Compiled, read-only form of the reference notes for ``notes_id``.
 
+    ``jwt`` authorizes the download outside of a request with the JWT header.
+    Compiled references are cached by file version, but every call first
+    fetches the file's metadata as the caller: that fails unless they may
+    read it, and a re-uploaded file gets a new version and is loaded afresh.
+    """
+    if (notes := _load_debug_notes(notes_id)) is not None:
+        return compile_reference(notes)
 
-def run_transkun(audio_bytes):
-    """Run Transkun on audio bytes and return NoteList."""
-    return beam_transkun.remote(audio_bytes)
+    storage = Storage(get_user_client(jwt))
+    info = storage.get_file(misc_bucket, notes_id)
+    key = (notes_id, info["$updatedAt"])
+    if (reference := reference_cache.get(key)) is not None:
+        return reference
+
+    reference = compile_reference(
+        _parse_notes(read_file(storage, misc_bucket, notes_id, info))
+    )
+    reference_cache.put(key, reference, reference.nbytes)
+    logger.info(f"Compiled notes {notes_id}, cache: {reference_cache.stats()}")
+    return reference
 
 
-def parse_rep_output(replica, page_sizes) -> NoteList:
-    """Convert Replicate output dict into a NoteList."""
-    nl = NoteList()
-    nl.size.extend(page_sizes)
-    for ev in replica:
-        note = Note(
-            pitch=ev["pitch"],
-            start_time=ev["start"],
-            duration=ev["end"] - ev["start"],
-            velocity=ev["velocity"],
-            page=0,
-            track=0,
+def preload_references(notes_ids):
+    """Compile the given hot references with the admin key.
+
+    They are kept until evicted for space; each use is still authorized by
+    ``load_reference``.
+    """
+    storage = Storage(get_admin_client())
+    for notes_id in notes_ids:
+        try:
+            info = storage.get_file(misc_bucket, notes_id)
+            notes = _parse_notes(read_file(storage, misc_bucket, notes_id, info))
+        except Exception as e:
+            logger.warning(f"Could not preload notes {notes_id}: {e}")
+            continue
+        reference = compile_reference(notes)
+        reference_cache.put(
+            (notes_id, info["$updatedAt"]),
+            reference,
+            reference.nbytes,
+            ttl=float("inf"),
         )
-        note.id = len(nl.notes)
-        nl.notes.append(note)
-    return nl
 
 
 SAVE_RECORDINGS = False
 
 
-def recv_record(
-    score_id: str,
-    actual_notes: NoteList,
+def focused_page_header() -> int | None:
+    page = request.headers.get("X-Focused-Page")
+    return int(page) if page is not None else None
+
+
+def take_window(
+    reference: CompiledReference, played_notes: NoteList, focused_page: int | None
+) -> tuple[int, int] | None:
+    """Reference range to align a take against.
+
+    Without a focused page, short takes are located in the score by their
+    pitch intervals, so snippets played from anywhere only align against the
+    part they came from; long takes align against the whole score.
+    """
+    if focused_page is not None:
+        window = reference.focus_window(focused_page, NOTE_EXTENSION)
+        logger.debug(f"Focus window for page {focused_page}: {window}")
+        return window
+
+    if len(played_notes.notes) > LOCATE_MAX_NOTES:
+        return None
+    candidates = reference.locate(played_notes.notes, top_k=1)
+    logger.debug(f"Located take at {candidates}")
+    return candidates[0][:2] if candidates else None
+
+
+def build_recording(
+    reference: CompiledReference,
     played_notes: NoteList,
-    focused_page: int,
+    ops: ScoringResult,
+    aligned_idx,
     *,
     is_test: bool,
-    result_file: Optional[str] = None,
-) -> Response:
-    focused_indices = [
-        idx for idx, note in enumerate(actual_notes.notes) if note.page == focused_page
-    ]
-    logger.debug(f"matching notes length: {len(focused_indices)}")
-
-    window = (
-        (
-            max(0, focused_indices[0] - NOTE_EXTENSION),
-            focused_indices[-1] + NOTE_EXTENSION,
-        )
-        if focused_indices
-        else None
-    )
-
-    ops, aligned_idx, total_cost = find_edit_ops(
-        actual_notes.notes,
-        played_notes.notes,
-        window,
-    )
-    ops.size.extend(actual_notes.size)
+) -> Recording:
+    """Attach tempo analysis to aligned edits and wrap them in a Recording."""
+    ops.size.extend(reference.size)
 
     sections, unstable = analyze_tempo(
-        [float(n.start_time) for n in actual_notes.notes],
-        [float(n.start_time) for n in played_notes.notes],
+        reference.starts,
+        note_times(played_notes.notes),
         aligned_idx,
     )
     ops.unstable_rate = unstable
     ops.tempo_sections.extend(sections)
 
-    logger.debug(f"Edit distance total cost: {total_cost}")
-
-    response_notes = NoteList()
+    recording = Recording()
+    response_notes = recording.played_notes
     if is_test:
         response_notes.notes.extend(played_notes.notes)
-        response_notes.size.extend(actual_notes.size)
+        response_notes.size.extend(reference.size)
     else:
         response_notes.CopyFrom(played_notes)
-        if not response_notes.size and actual_notes.size:
-            response_notes.size.extend(actual_notes.size)
+        if not response_notes.size and reference.size:
+            response_notes.size.extend(reference.size)
 
+    # Compact edits reference played notes by index, which is also their id.
     for idx, note in enumerate(response_notes.notes):
         note.id = idx
 
-    recording = Recording()
-    recording.played_notes.CopyFrom(response_notes)
     recording.computed_edits.CopyFrom(ops)
     created_at = Timestamp()
     created_at.FromDatetime(datetime.now(timezone.utc))
     recording.created_at.CopyFrom(created_at)
+    return recording
+
+
+def accepted_response(job: ScoringJob):
+    """202 reply for a submitted job, pointing at its status endpoint."""
+    return job.summary(), 202, {"Location": f"/api/score/jobs/{job.id}"}
+
+
+def wants_compact_edits() -> bool:
+    """Clients opt into ``ScoringResult.compact_edits`` with ``X-Edit-Format``."""
+    return request.headers.get("X-Edit-Format", "").lower() == "compact"
+
+
+def protobuf_response(payload: bytes, response_format: str = "recording") -> Response:
+    response = Response(payload, mimetype="application/protobuf")
+    response.headers.update(
+        {
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "Pragma": "no-cache",
+            "Expires": "0",
+            "X-Response-Format": response_format,
+        }
+    )
+    return response
+
+
+def score_take(
+    score_id: str,
+    reference: CompiledReference,
+    played_notes: NoteList,
+    focused_page: int | None,
+    *,
+    is_test: bool,
+    result_file: Optional[str] = None,
+    compact: bool = False,
+    user_id: Optional[str] = None,
+    jwt: Optional[str] = None,
+) -> bytes:
+    """Align a take and return the serialized Recording.
+
+    Needs no request context when ``user_id`` and ``jwt`` are given, so it can
+    also run on the job executor.
+    """
+    window = take_window(reference, played_notes, focused_page)
+
+    ops, aligned_idx, total_cost = reference.find_edit_ops(
+        played_notes.notes,
+        window=window,
+        band=ALIGNMENT_BAND,
+        compact=compact,
+        anchor_length=ALIGNMENT_ANCHOR_LENGTH,
+    )
+    logger.debug(f"Edit distance total cost: {total_cost}")
+
+    recording = build_recording(
+        reference, played_notes, ops, aligned_idx, is_test=is_test
+    )
 
     if not is_test and SAVE_RECORDINGS:
-        client = get_user_client()
+        client = get_user_client(jwt)
         storage = Storage(client)
         db = Databases(client)
-        user_role = Role.user(g.account["$id"])
+        user_id = user_id or g.account["$id"]
+        user_role = Role.user(user_id)
         try:
             file_res = storage.create_file(
                 bucket_id=misc_bucket,
@@ -203,7 +298,7 @@ def recv_record(
                 collection_id=os.environ["RECORDINGS_COLLECTION_ID"],
                 document_id="unique()",
                 data={
-                    "user_id": g.account["$id"],
+                    "user_id": user_id,
                     "score_id": score_id,
                     "file_id": file_res["$id"],
                 },
@@ -225,7 +320,7 @@ def recv_record(
             return " ".join(match.group().split())
 
         with open("resources/debug_info/last_edits.json", "w") as f:
-            dumps = json.dumps(aligned_idx, ensure_ascii=False, indent=4)
+            dumps = json.dumps(aligned_idx.tolist(), ensure_ascii=False, indent=4)
             f.write(re.sub(r"(?<=\[)[^\[\]]+(?=])", _join, dumps))
 
         with open("resources/debug_info/last_pb.pb", "wb") as f:
@@ -235,20 +330,40 @@ def recv_record(
             with open(result_file, "wb") as f:
                 f.write(payload)
 
-    response = Response(payload, mimetype="application/protobuf")
-    response.headers.update(
-        {
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0",
-            "X-Response-Format": "recording",
-        }
+    return payload
+
+
+def recv_record(
+    score_id: str,
+    reference: CompiledReference,
+    played_notes: NoteList,
+    focused_page: int | None,
+    *,
+    is_test: bool,
+    result_file: Optional[str] = None,
+    compact: bool = False,
+) -> Response:
+    return protobuf_response(
+        score_take(
+            score_id,
+            reference,
+            played_notes,
+            focused_page,
+            is_test=is_test,
+            result_file=result_file,
+            compact=compact,
+        )
     )
-    return response
 
 
 @scoring_bp.route("/receive-audio", methods=["POST"])
 def receive_audio():
+    """Transcribe and score a recording.
+
+    With ``Prefer: respond-async`` the request returns 202 with a job id right
+    away; the Recording is then polled from ``/jobs/<id>`` or pushed to the
+    user's ``/live`` sockets.
+    """
     audio_bytes = request.data
     if not audio_bytes:
         return {"error": "No audio scores received"}, 400
@@ -265,63 +380,60 @@ def receive_audio():
         is_test = test_type and test_type != "production"
 
         result_file: Optional[str] = None
+        played_notes: Optional[NoteList] = None
 
         if is_test:
             cfg = test_cfg.get(str(test_type), test_cfg["spider_dance_played"])
             logger.info(f"Using test config: {test_type}")
             played_notes = load_notes(cfg["played"])
-            actual_notes = load_notes(cfg["actual"])
+            reference = load_reference(cfg["actual"])
 
             if (result_file := cfg.get("recording")) and os.path.exists(result_file):
                 logger.info(f"Using cached result")
                 with open(result_file, "rb") as f:
                     byte_content = f.read()
-                res = Response(byte_content, mimetype="application/protobuf")
-                res.headers.update(
-                    {
-                        "Cache-Control": "no-cache, no-store, must-revalidate",
-                        "Pragma": "no-cache",
-                        "Expires": "0",
-                        "X-Response-Format": "recording",
-                    }
-                )
-                return res
+                return protobuf_response(byte_content)
         else:
             if not notes_id:
                 return {"error": "No notes ID provided"}, 400
 
+            import magic
+
             mime_type = magic.from_buffer(audio_bytes, mime=True)
             ext = mimetypes.guess_extension(mime_type) or ".bin"
             logger.info(f"Detected MIME type: {mime_type}, using extension: {ext}")
 
             if os.environ.get("DEBUG") == "True":
-                tmp_path = f"resources/debug_info/last_audio{ext}"
-                with open(tmp_path, "wb") as f:
+                with open(f"resources/debug_info/last_audio{ext}", "wb") as f:
                     f.write(audio_bytes)
-            else:
-                fd, tmp_path = tempfile.mkstemp(suffix=ext)
-                with os.fdopen(fd, "wb") as tmp:
-                    tmp.write(audio_bytes)
 
-            actual_notes = load_notes(notes_id)
-
-            output = run_transkun(audio_bytes)
-
-            if os.environ.get("DEBUG") != "True":
-                os.unlink(tmp_path)
+            reference = load_reference(notes_id)
+
+        focused_page = focused_page_header()
+        compact = wants_compact_edits()
+        jwt = _get_jwt(request.headers.get("X-Appwrite-JWT"))
+        user_id = g.account["$id"] if g.get("account") else None
+
+        def process() -> bytes:
+            take = played_notes
+            if take is None:
+                take = transcribe(audio_bytes, reference.size)
+
+            return score_take(
+                score_id,
+                reference,
+                take,
+                focused_page,
+                is_test=is_test,
+                result_file=result_file,
+                compact=compact,
+                user_id=user_id,
+                jwt=jwt,
+            )
 
-            rep_out = json.loads(output) if isinstance(output, str) else output
-            played_notes = parse_rep_output(rep_out, actual_notes.size)
-
-        focused_page = int(request.headers.get("X-Focused-Page", 0))
-        return recv_record(
-            score_id,
-            actual_notes,
-            played_notes,
-            focused_page,
-            is_test=is_test,
-            result_file=result_file,
-        )
+        if wants_async():
+            return accepted_response(submit_job(process, "Error processing audio"))
+        return protobuf_response(process())
 
     except Exception as e:
         print_exc()
@@ -330,6 +442,19 @@ def receive_audio():
         return {"error": err}, 400
 
 
+@scoring_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Poll a scoring job: 202 while it runs, the Recording once it is done."""
+    job = get_job(job_id, g.account["$id"])
+    if job is None:
+        return {"error": "Job not found"}, 404
+    if job.status == "done":
+        return protobuf_response(job.result)
+    if job.status == "failed":
+        return job.summary(), 400
+    return job.summary(), 202
+
+
 @scoring_bp.route("/receive-notes", methods=["POST"])
 def receive_notes():
     raw_bytes = request.data
@@ -351,12 +476,99 @@ def receive_notes():
         return {"error": "Invalid note list payload"}, 400
 
     logger.debug(f"Note list: {[pitch_name(n.pitch) for n in note_list.notes]}")
-    actual_notes = load_notes(notes_id)
-    focused_page = int(request.headers.get("X-Focused-Page", 0))
+    reference = load_reference(notes_id)
+    focused_page = focused_page_header()
     return recv_record(
         score_id,
-        actual_notes,
+        reference,
         note_list,
         focused_page,
         is_test=False,
+        compact=wants_compact_edits(),
+    )
+
+
+@scoring_bp.route("/receive-takes", methods=["POST"])
+def receive_takes():
+    """Score several takes of the same score in one request.
+
+    Takes are sent as multipart files: ``takes`` parts hold serialized NoteLists
+    and ``recordings`` parts hold audio to transcribe. Takes are aligned in one
+    native batch call per alignment window and returned as a RecordingList in
+    upload order, note lists first. ``X-Focused-Page`` picks the window as for
+    single takes; without it, each take is located in the score.
+    """
+    score_id = request.headers.get("X-Score-ID")
+    notes_id = request.headers.get("X-Notes-ID")
+    if not score_id:
+        return {"error": "No score ID provided"}, 400
+    if not notes_id:
+        return {"error": "No notes ID provided"}, 400
+
+    note_files = request.files.getlist("takes")
+    audio_files = request.files.getlist("recordings")
+    if not note_files and not audio_files:
+        return {"error": "No takes received"}, 400
+    if len(note_files) + len(audio_files) > MAX_BATCH_TAKES:
+        return {"error": f"At most {MAX_BATCH_TAKES} takes per request"}, 400
+
+    try:
+        focused_page = focused_page_header()
+    except ValueError:
+        return {"error": "X-Focused-Page must be an integer"}, 400
+
+    takes: list[NoteList] = []
+    for file in note_files:
+        note_list = NoteList()
+        try:
+            note_list.ParseFromString(file.read())
+        except DecodeError as exc:
+            logger.error(f"Failed to parse take {file.filename}: {exc}")
+            return {"error": f"Invalid note list payload: {file.filename}"}, 400
+        takes.append(note_list)
+
+    try:
+        reference = load_reference(notes_id)
+
+        if audio_files:
+            audio_payloads = [file.read() for file in audio_files]
+            with ThreadPoolExecutor(max_workers=len(audio_payloads)) as pool:
+                takes.extend(
+                    pool.map(
+                        lambda payload: transcribe(payload, reference.size),
+                        audio_payloads,
+                    )
+                )
+
+        # Takes sharing a window (all of them, with a focused page) are
+        # aligned in one batch call.
+        windows = [take_window(reference, take, focused_page) for take in takes]
+        scored = [None] * len(takes)
+        for window in dict.fromkeys(windows):
+            batch = [k for k, w in enumerate(windows) if w == window]
+            results = reference.find_edit_ops_batch(
+                [takes[k].notes for k in batch],
+                window=window,
+                band=ALIGNMENT_BAND,
+                compact=wants_compact_edits(),
+            )
+            for k, result in zip(batch, results):
+                scored[k] = result
+
+        recordings = RecordingList()
+        for take, (ops, aligned_idx, total_cost) in zip(takes, scored):
+            logger.debug(f"Edit distance total cost: {total_cost}")
+            recordings.recordings.append(
+                build_recording(reference, take, ops, aligned_idx, is_test=False)
+            )
+    except Exception as e:
+        print_exc()
+        err = f"Error processing takes: {e}"
+        logger.error(f"ERROR: {err}")
+        return {"error": err}, 400
+
+    payload = recordings.SerializeToString()
+    logger.info(
+        f"Scored {len(takes)} takes for score {score_id}, payload size: {len(payload)} bytes"
     )
+    return protobuf_response(payload, "recording-list")
@@ -0,0 +1,160 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from traceback import print_exc
+from typing import Callable, Optional
+
+from flask import current_app, g, request
+from loguru import logger
+
+from ..sessions import UPLOAD_DB, SqliteStore
+
+# Background workers for scoring jobs; they mostly wait on remote inference.
+JOB_WORKERS = int(os.environ.get("SCORING_JOB_WORKERS", 8))
+# Finished jobs are kept this long for polling before they are dropped.
+JOB_TTL_SECONDS = int(os.environ.get("SCORING_JOB_TTL_SECONDS", 600))
+
+job_executor = ThreadPoolExecutor(
+    max_workers=JOB_WORKERS, thread_name_prefix="scoring-job"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result BLOB,
+    error TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at);
+"""
+
+
+@dataclass
+class ScoringJob:
+    """A scoring request running on ``job_executor``.
+
+    ``status`` moves from ``pending`` to ``running`` to ``done`` (``result``
+    holds the serialized Recording) or ``failed`` (``error`` holds the message).
+    """
+
+    id: str
+    user_id: str
+    status: str = "pending"
+    result: Optional[bytes] = None
+    error: Optional[str] = None
+    finished_at: Optional[float] = None
+
+    def summary(self) -> dict:
+        summary = {"job_id": self.id, "status": self.status}
+        if self.error is not None:
+            summary["error"] = self.error
+        return summary
+
+
+class JobStore(SqliteStore):
+    """Scoring jobs in SQLite, so a poll can reach any worker process.
+
+    The job runs in the process that accepted it, which writes every status
+    change here. Finished jobs expire ``ttl`` seconds after they finish.
+    """
+
+    def __init__(self, path: str = UPLOAD_DB, ttl: int = JOB_TTL_SECONDS):
+        super().__init__(path, _SCHEMA)
+        self.ttl = ttl
+
+    def put(self, job: ScoringJob):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO jobs (id, user_id, status, result, error, "
+            "finished_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                job.id,
+                job.user_id,
+                job.status,
+                job.result,
+                job.error,
+                job.finished_at,
+            ),
+        )
+
+    def get(self, job_id: str) -> Optional[ScoringJob]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT id, user_id, status, result, error, finished_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            )
+            .fetchone()
+        )
+        return ScoringJob(*row) if row else None
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop the jobs that finished over ``ttl`` seconds ago; return how many."""
+        cutoff = (time.time() if now is None else now) - self.ttl
+        return (
+            self._connection()
+            .execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+            .rowcount
+        )
+
+
+jobs = JobStore()
+
+
+def user_room(user_id: str) -> str:
+    """Socket.IO room every ``/live`` connection of ``user_id`` joins."""
+    return f"user:{user_id}"
+
+
+def wants_async() -> bool:
+    """Clients opt into job mode with ``Prefer: respond-async`` (RFC 7240)."""
+    return "respond-async" in request.headers.get("Prefer", "").lower()
+
+
+def get_job(job_id: str, user_id: str) -> ScoringJob | None:
+    jobs.expire()
+    job = jobs.get(job_id)
+    return job if job is not None and job.user_id == user_id else None
+
+
+def submit_job(work: Callable[[], bytes], error_prefix: str) -> ScoringJob:
+    """Run ``work`` on the job executor for the logged in user.
+
+    The outcome is also pushed as a ``job`` event to the user's ``/live``
+    sockets, so connected clients need not poll.
+    """
+    jobs.expire()
+    job = ScoringJob(id=uuid.uuid4().hex, user_id=g.account["$id"])
+    jobs.put(job)
+
+    socketio = current_app.extensions.get("socketio")
+
+    def run():
+        job.status = "running"
+        jobs.put(job)
+        try:
+            job.result = work()
+            job.status = "done"
+        except Exception as e:
+            print_exc()
+            job.error = f"{error_prefix}: {e}"
+            job.status = "failed"
+            logger.error(f"ERROR: job {job.id}: {job.error}")
+        job.finished_at = time.time()
+        jobs.put(job)
+
+        if socketio is not None:
+            socketio.emit(
+                "job",
+                {**job.summary(), "recording": job.result},
+                to=user_room(job.user_id),
+                namespace="/live",
+            )
+
+    job_executor.submit(run)
+    logger.info(f"Submitted scoring job {job.id}")
+    return job
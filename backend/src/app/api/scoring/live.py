@@ -0,0 +1,113 @@
+from flask import request
+from flask_socketio import ConnectionRefusedError, Namespace, emit, join_room
+from google.protobuf.message import DecodeError
+from loguru import logger
+
+from ... import LiveAlignment, NoteList
+from ..util import _get_jwt
+from .. import get_account
+from .audio import ALIGNMENT_BAND, NOTE_EXTENSION, build_recording, load_reference
+from .jobs import user_room
+
+# Live sessions and the JWT they connected with, by Socket.IO session id.
+live_sessions: dict[str, LiveAlignment] = {}
+live_jwts: dict[str, str] = {}
+
+
+class LiveScoringNamespace(Namespace):
+    """Score following: clients stream notes while playing and get feedback per note.
+
+    Events from the client:
+
+    - ``start`` ``{"notes_id", "focused_page"?}`` opens a session and answers
+      ``started``. Without a focused page the whole score is followed.
+    - ``notes`` (a serialized NoteList of newly played notes) answers
+      ``progress`` with one update per note and the running tempo.
+    - ``finish`` ``{"compact"?}`` aligns the whole take offline and answers
+      ``recording`` with the serialized Recording.
+
+    Failures are reported as ``error`` events. Scoring jobs of the connected
+    user report back as ``job`` events.
+    """
+
+    def on_connect(self, auth=None):
+        jwt = _get_jwt((auth or {}).get("jwt") or request.headers.get("X-Appwrite-JWT"))
+        try:
+            account = get_account(jwt)
+        except Exception as e:
+            logger.debug("Not logged in: {}", e)
+            raise ConnectionRefusedError(
+                "You must be logged in to access this resource"
+            )
+        live_jwts[request.sid] = jwt
+        join_room(user_room(account["$id"]))
+
+    def on_disconnect(self, reason=None):
+        live_sessions.pop(request.sid, None)
+        live_jwts.pop(request.sid, None)
+
+    def on_start(self, data=None):
+        data = {} if data is None else data
+        if not isinstance(data, dict):
+            emit("error", {"error": "start expects an object"})
+            return
+        notes_id = data.get("notes_id")
+        if not notes_id:
+            emit("error", {"error": "No notes ID provided"})
+            return
+        page = data.get("focused_page")
+        try:
+            page = int(page) if page is not None else None
+        except (TypeError, ValueError):
+            emit("error", {"error": "focused_page must be an integer"})
+            return
+
+        try:
+            reference = load_reference(notes_id, live_jwts[request.sid])
+        except Exception as e:
+            logger.error(f"Failed to load notes {notes_id}: {e}")
+            emit("error", {"error": f"Could not load notes {notes_id}"})
+            return
+
+        window = (
+            reference.focus_window(page, NOTE_EXTENSION) if page is not None else None
+        )
+        live_sessions[request.sid] = LiveAlignment(reference, window)
+        logger.debug(f"Live session {request.sid} following {notes_id} in {window}")
+        emit("started", {"window": window, "size": len(reference)})
+
+    def on_notes(self, payload):
+        session = live_sessions.get(request.sid)
+        if session is None:
+            emit("error", {"error": "No live session, send start first"})
+            return
+
+        note_list = NoteList()
+        try:
+            note_list.ParseFromString(payload)
+        except (DecodeError, TypeError) as exc:
+            logger.error(f"Failed to parse live notes: {exc}")
+            emit("error", {"error": "Invalid note list payload"})
+            return
+
+        updates = session.push(note_list.notes)
+        emit("progress", {"notes": updates, "tempo": session.tempo()})
+
+    def on_finish(self, data=None):
+        data = {} if data is None else data
+        if not isinstance(data, dict):
+            emit("error", {"error": "finish expects an object"})
+            return
+        session = live_sessions.pop(request.sid, None)
+        if session is None:
+            emit("error", {"error": "No live session, send start first"})
+            return
+
+        ops, aligned_idx, total_cost = session.finish(
+            band=ALIGNMENT_BAND, compact=bool(data.get("compact"))
+        )
+        logger.debug(f"Live session {request.sid} total cost: {total_cost}")
+        recording = build_recording(
+            session.reference, session.played, ops, aligned_idx, is_test=False
+        )
+        emit("recording", recording.SerializeToString())
@@ -4,6 +4,7 @@ from google.protobuf.message import DecodeError
 from loguru import logger
 from ... import Recording
 from .. import get_user_client, misc_bucket
+from ..blobs import read_file
 from . import scoring_bp
 
 
@@ -15,7 +16,7 @@ def process_recording(rec_id):
 
     client = get_user_client()
     storage = Storage(client)
-    rec_bytes = storage.get_file_view(misc_bucket, rec_id)
+    rec_bytes = read_file(storage, misc_bucket, rec_id)
 
     recording = Recording()
     try:
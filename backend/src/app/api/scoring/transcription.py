@@ -0,0 +1,273 @@
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator
+
+import numpy as np
+from loguru import logger
+
+from ... import Note, NoteList
+
+# Rate recordings are decoded to before they are split into windows.
+TRANSCRIBE_SAMPLE_RATE = 44100
+# Recordings longer than one window plus the overlap are transcribed in windows.
+TRANSCRIBE_WINDOW_SECONDS = float(os.environ.get("TRANSCRIBE_WINDOW_SECONDS", 60))
+TRANSCRIBE_OVERLAP_SECONDS = float(os.environ.get("TRANSCRIBE_OVERLAP_SECONDS", 4))
+# Remote transcriptions in flight across all requests.
+TRANSCRIBE_MAX_CONCURRENCY = int(os.environ.get("TRANSCRIBE_MAX_CONCURRENCY", 8))
+# Same-pitch onsets this close on either side of a window boundary are one note.
+DUPLICATE_ONSET_SECONDS = 0.05
+# Leading and trailing audio quieter than this is not sent for transcription.
+SILENCE_THRESHOLD_DB = float(os.environ.get("SILENCE_THRESHOLD_DB", -50))
+# Audio kept around the first and last loud frame so onsets and decays survive.
+SILENCE_PADDING_SECONDS = 0.25
+SILENCE_FRAME = 1024
+FFMPEG = os.environ.get("FFMPEG_BINARY", "ffmpeg")
+
+transcribe_executor = ThreadPoolExecutor(
+    max_workers=TRANSCRIBE_MAX_CONCURRENCY, thread_name_prefix="transkun"
+)
+
+
+@lru_cache(maxsize=1)
+def _transkun_endpoint():
+    # The Beam SDK takes most of a second to import, so it waits for the first
+    # transcription instead of every cold start.
+    from beam import Image, endpoint
+
+    @endpoint(
+        gpu="T4",
+        keep_warm_seconds=100,
+        app=os.environ.get("APP_NAME"),
+        image=Image(python_packages=["git+https://github.com/orangishcat/transkun"]),
+    )
+    def beam_transkun(audio_bytes):
+        """Run Transkun on audio bytes and return NoteList."""
+
+        # noinspection PyUnresolvedReferences
+        from transkun.predict_return_notes import predict
+
+        return predict(audio_bytes)
+
+    return beam_transkun
+
+
+def __getattr__(name):
+    # Keeps ``transcription:beam_transkun`` resolvable for ``beam deploy``.
+    if name == "beam_transkun":
+        return _transkun_endpoint()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def run_transkun(audio_bytes) -> list[dict]:
+    """Run Transkun on audio bytes and return its note events."""
+    output = _transkun_endpoint().remote(audio_bytes)
+    return json.loads(output) if isinstance(output, str) else output
+
+
+def parse_rep_output(replica, page_sizes) -> NoteList:
+    """Convert Replicate output dict into a NoteList."""
+    nl = NoteList()
+    nl.size.extend(page_sizes)
+    for ev in replica:
+        note = Note(
+            pitch=ev["pitch"],
+            start_time=ev["start"],
+            duration=ev["end"] - ev["start"],
+            velocity=ev["velocity"],
+            page=0,
+            track=0,
+        )
+        note.id = len(nl.notes)
+        nl.notes.append(note)
+    return nl
+
+
+def decode_audio(audio_bytes: bytes) -> np.ndarray:
+    """Decode any container ffmpeg understands to mono float32 samples."""
+    result = subprocess.run(
+        [
+            FFMPEG,
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-i",
+            "pipe:0",
+            "-f",
+            "f32le",
+            "-ac",
+            "1",
+            "-ar",
+            str(TRANSCRIBE_SAMPLE_RATE),
+            "pipe:1",
+        ],
+        input=audio_bytes,
+        capture_output=True,
+        check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def encode_flac(samples: np.ndarray) -> bytes:
+    """16-bit mono FLAC of float samples at ``TRANSCRIBE_SAMPLE_RATE``."""
+    result = subprocess.run(
+        [
+            FFMPEG,
+            "-nostdin",
+            "-loglevel",
+            "error",
+            "-f",
+            "f32le",
+            "-ac",
+            "1",
+            "-ar",
+            str(TRANSCRIBE_SAMPLE_RATE),
+            "-i",
+            "pipe:0",
+            "-sample_fmt",
+            "s16",
+            "-f",
+            "flac",
+            "pipe:1",
+        ],
+        input=np.ascontiguousarray(samples, dtype=np.float32).tobytes(),
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def trim_silence(samples: np.ndarray) -> tuple[int, int]:
+    """Sample range ``[start, end)`` between leading and trailing silence.
+
+    Silence is judged on the RMS level of ``SILENCE_FRAME``-sample frames; an
+    all-silent recording gives an empty range.
+    """
+    frames = len(samples) // SILENCE_FRAME
+    if frames == 0:
+        return 0, len(samples)
+    blocks = samples[: frames * SILENCE_FRAME].reshape(frames, SILENCE_FRAME)
+    rms = np.sqrt(np.mean(np.square(blocks, dtype=np.float64), axis=1))
+    loud = np.flatnonzero(rms > 10 ** (SILENCE_THRESHOLD_DB / 20))
+    if len(loud) == 0:
+        return 0, 0
+    padding = int(SILENCE_PADDING_SECONDS * TRANSCRIBE_SAMPLE_RATE)
+    start = max(0, int(loud[0]) * SILENCE_FRAME - padding)
+    end = min(len(samples), (int(loud[-1]) + 1) * SILENCE_FRAME + padding)
+    return start, end
+
+
+def window_starts(duration: float) -> list[float]:
+    """Start times of the overlapping windows covering ``duration`` seconds."""
+    hop = TRANSCRIBE_WINDOW_SECONDS - TRANSCRIBE_OVERLAP_SECONDS
+    count = max(1, int(np.ceil((duration - TRANSCRIBE_OVERLAP_SECONDS) / hop)))
+    return [k * hop for k in range(count)]
+
+
+def merge_window(
+    events: list[dict],
+    offset: float,
+    owned: tuple[float, float],
+    carried: list[dict],
+) -> tuple[list[dict], list[dict]]:
+    """Shift a window's events to recording time and keep the ones it owns.
+
+    Every onset belongs to the window whose ``owned`` range contains it; the
+    ranges meet at the middle of each overlap and are widened by
+    ``DUPLICATE_ONSET_SECONDS`` so onset jitter cannot drop a note there.
+
+    Events close enough to the end of the range that the next window may
+    report them again are not returned yet: they come back as the second
+    list, to be passed as ``carried`` with the next window. An event matching
+    a carried one is dropped as a duplicate and only extends it, so no event
+    changes after it has been returned. Returns the events ready to report,
+    carried ones first, and the ones to carry on.
+    """
+    lo, hi = owned[0] - DUPLICATE_ONSET_SECONDS, owned[1] + DUPLICATE_ONSET_SECONDS
+    carried = [dict(ev) for ev in carried]
+    recent = {ev["pitch"]: ev for ev in carried}
+    kept = []
+    for ev in events:
+        ev = {**ev, "start": ev["start"] + offset, "end": ev["end"] + offset}
+        if not lo <= ev["start"] < hi:
+            continue
+        earlier = recent.get(ev["pitch"])
+        if (
+            earlier is not None
+            and abs(ev["start"] - earlier["start"]) <= 2 * DUPLICATE_ONSET_SECONDS
+        ):
+            earlier["end"] = max(earlier["end"], ev["end"])
+            continue
+        kept.append(ev)
+
+    merged = carried + kept
+    boundary = owned[1] - 2 * DUPLICATE_ONSET_SECONDS
+    ready = [ev for ev in merged if ev["start"] < boundary]
+    pending = [ev for ev in merged if ev["start"] >= boundary]
+    return ready, pending
+
+
+def iter_transcription(audio_bytes: bytes) -> Iterator[list[dict]]:
+    """Note events of a recording, one list per window in recording order.
+
+    The recording is decoded to mono at ``TRANSCRIBE_SAMPLE_RATE``, leading and
+    trailing silence is cut and only the rest is sent, as FLAC. Event times
+    are shifted back by the trimmed offset, so they match the original audio.
+
+    Windows are transcribed concurrently on ``transcribe_executor``; each list
+    is yielded as soon as its window and all earlier ones are done, so callers
+    can start on the beginning of a recording while the rest is in flight.
+    Notes starting right at the end of a window are reported with the next
+    one (see ``merge_window``).
+    Undecodable recordings are sent as they are, in one request.
+    """
+    try:
+        samples = decode_audio(audio_bytes)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Could not decode audio, transcribing it whole: {e}")
+        yield run_transkun(audio_bytes)
+        return
+
+    first, last = trim_silence(samples)
+    offset = first / TRANSCRIBE_SAMPLE_RATE
+    duration = (last - first) / TRANSCRIBE_SAMPLE_RATE
+    logger.info(
+        f"Trimmed audio to {offset:.2f}s-{last / TRANSCRIBE_SAMPLE_RATE:.2f}s "
+        f"of {len(samples) / TRANSCRIBE_SAMPLE_RATE:.2f}s"
+    )
+    if duration == 0:
+        return
+    samples = samples[first:last]
+
+    if duration <= TRANSCRIBE_WINDOW_SECONDS + TRANSCRIBE_OVERLAP_SECONDS:
+        events, _ = merge_window(
+            run_transkun(encode_flac(samples)), offset, (-np.inf, np.inf), []
+        )
+        yield events
+        return
+
+    starts = window_starts(duration)
+    logger.info(f"Transcribing {duration:.1f}s of audio in {len(starts)} windows")
+    width = int(TRANSCRIBE_WINDOW_SECONDS * TRANSCRIBE_SAMPLE_RATE)
+    futures = []
+    for start in starts:
+        begin = int(start * TRANSCRIBE_SAMPLE_RATE)
+        payload = encode_flac(samples[begin : begin + width])
+        futures.append(transcribe_executor.submit(run_transkun, payload))
+
+    half_overlap = TRANSCRIBE_OVERLAP_SECONDS / 2
+    bounds = [-np.inf, *(offset + start + half_overlap for start in starts[1:]), np.inf]
+    carried: list[dict] = []
+    for k, (start, future) in enumerate(zip(starts, futures)):
+        events, carried = merge_window(
+            future.result(), offset + start, (bounds[k], bounds[k + 1]), carried
+        )
+        yield events
+
+
+def transcribe(audio_bytes: bytes, page_sizes) -> NoteList:
+    """Transcribe a recording of any length into one NoteList."""
+    events = [ev for window in iter_transcription(audio_bytes) for ev in window]
+    return parse_rep_output(events, page_sizes)
@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import NamedTuple, Optional
+
+# Shared by every worker process on the host, so any of them can serve a session.
+UPLOAD_FOLDER = os.environ.get(
+    "UPLOAD_FOLDER", os.path.join(tempfile.gettempdir(), "note-uploads")
+)
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+UPLOAD_DB = os.environ.get("UPLOAD_DB", os.path.join(UPLOAD_FOLDER, "uploads.db"))
+# Uploads not confirmed within this many seconds are deleted.
+UPLOAD_TTL_SECONDS = int(os.environ.get("UPLOAD_TTL_SECONDS", 15 * 60))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    file_type TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT
+);
+CREATE INDEX IF NOT EXISTS uploads_session ON uploads (session, id);
+CREATE INDEX IF NOT EXISTS uploads_expiry ON uploads (expires_at);
+"""
+
+
+class UploadEntry(NamedTuple):
+    """A file uploaded in a session and waiting for ``confirm_upload``."""
+
+    path: str
+    created_at: float
+    file_type: str
+    filename: str
+    content_type: Optional[str]
+
+
+class SqliteStore:
+    """State shared by the worker processes of one host, in a SQLite file.
+
+    Each thread gets its own connection; WAL mode lets worker processes read
+    while another one writes.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(schema)
+        conn.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so they are per process and thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+
+class UploadStore(SqliteStore):
+    """Upload sessions in SQLite, indexed by session and by expiry.
+
+    Expiry walks the ``expires_at`` index, so its cost is proportional to the
+    entries it removes.
+    """
+
+    def __init__(self, path: str = UPLOAD_DB, ttl: int = UPLOAD_TTL_SECONDS):
+        super().__init__(path, _SCHEMA)
+        self.ttl = ttl
+
+    def add(self, session: str, entry: UploadEntry):
+        self._connection().execute(
+            "INSERT INTO uploads (session, expires_at, path, created_at, file_type, "
+            "filename, content_type) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session, entry.created_at + self.ttl, *entry),
+        )
+
+    def get(self, session: str) -> list[UploadEntry]:
+        rows = self._connection().execute(
+            "SELECT path, created_at, file_type, filename, content_type "
+            "FROM uploads WHERE session = ? ORDER BY id",
+            (session,),
+        )
+        return [UploadEntry(*row) for row in rows]
+
+    def remove(self, session: str, filename: str) -> Optional[UploadEntry]:
+        """Drop the first upload of ``filename`` in ``session`` and return it."""
+        rows = self._connection().execute(
+            "DELETE FROM uploads WHERE id = (SELECT id FROM uploads "
+            "WHERE session = ? AND filename = ? ORDER BY id LIMIT 1) "
+            "RETURNING path, created_at, file_type, filename, content_type",
+            (session, filename),
+        )
+        # Read to the end so the statement, and its write lock, is finished.
+        row = next(iter(rows.fetchall()), None)
+        return UploadEntry(*row) if row else None
+
+    def pop(self, session: str) -> list[UploadEntry]:
+        """Drop every upload of ``session`` and return them."""
+        rows = self._connection().execute(
+            "DELETE FROM uploads WHERE session = ? "
+            "RETURNING path, created_at, file_type, filename, content_type",
+            (session,),
+        )
+        return [UploadEntry(*row) for row in rows]
+
+    def expire(self, now: Optional[float] = None) -> list[UploadEntry]:
+        """Drop every upload past its expiry and return them."""
+        rows = self._connection().execute(
+            "DELETE FROM uploads WHERE expires_at <= ? "
+            "RETURNING path, created_at, file_type, filename, content_type",
+            (time.time() if now is None else now,),
+        )
+        return [UploadEntry(*row) for row in rows]
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+
+uploads = UploadStore()
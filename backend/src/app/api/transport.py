@@ -0,0 +1,70 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import appwrite.client
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+# Keep-alive connections to Appwrite kept open per process.
+APPWRITE_POOL_SIZE = int(os.environ.get("APPWRITE_POOL_SIZE", 32))
+
+
+class PooledTransport:
+    """Stands in for ``requests`` in ``appwrite.client``, over one shared Session.
+
+    The SDK sends every call through ``requests.request``, which opens a new
+    connection (and TLS handshake) each time. Routing it through a Session
+    keeps connections alive across clients, requests and threads; a client is
+    then only its headers, so each user's JWT travels with the call itself.
+
+    The Session ignores cookies, so nothing one user's response sets is sent
+    on another's request, and it is rebuilt in each process, so no pooled
+    socket is shared across a fork.
+    """
+
+    def __init__(self, pool_size: int = APPWRITE_POOL_SIZE):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._session = None
+        self._pid = None
+
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None or self._pid != os.getpid():
+                session = requests.Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session, self._pid = session, os.getpid()
+            return self._session
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        return self.session().request(method, url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+transport = PooledTransport()
+
+
+def install_transport():
+    """Route the Appwrite SDK's calls through ``transport``.
+
+    This replaces the ``requests`` module that ``appwrite.client`` imported,
+    which relies on the SDK calling ``requests.request`` (true of the 13.x
+    releases pinned in pyproject.toml). If the SDK no longer holds that
+    module, it is left alone and calls go out unpooled.
+    """
+    current = getattr(appwrite.client, "requests", None)
+    if current is transport:
+        return
+    if current is not requests:
+        logger.warning(
+            "appwrite.client does not use requests; Appwrite connections are not pooled"
+        )
+        return
+    appwrite.client.requests = transport
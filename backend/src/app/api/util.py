@@ -1,14 +1,18 @@
 import os
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from appwrite.client import Client
 from appwrite.services.account import Account
 from flask import request
 
-data = defaultdict(list)
+from ..cache import TTLCache, content_key
+
 score_file_types = ["mxl", "musicxml", "xml", "mxmls", "pdf", "png", "jpg", "jpeg"]
 audio_file_types = ["mp4", "mp3", "mov", "wav", "ogg", "avi", "m4a"]
 allowed_extensions = score_file_types + audio_file_types
+# Largest request /score/upload accepts; larger ones are cut off while receiving.
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 200 * 1024 * 1024))
 
 database = os.environ["DATABASE_ID"]
 scores_bucket = os.environ["SCORES_BUCKET_ID"]
@@ -17,15 +21,34 @@ misc_bucket = os.environ["FILES_BUCKET_ID"]
 score_collection = os.environ["SCORES_COLLECTION_ID"]
 folder_collection = os.environ["FOLDERS_COLLECTION_ID"]
 recordings_collection = os.environ.get("RECORDINGS_COLLECTION_ID")
+# Accounts resolved from a JWT are reused for this long without asking Appwrite.
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", 30))
+SESSION_CACHE_SIZE = int(os.environ.get("SESSION_CACHE_SIZE", 4096))
+
+# Accounts by the SHA-256 of the JWT they were resolved with.
+session_cache = TTLCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS)
+
+# Shared pool for Appwrite requests that can overlap, bounded across requests.
+io_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("APPWRITE_IO_WORKERS", 16)),
+    thread_name_prefix="appwrite-io",
+)
 
 
 def get_client():
+    # Cheap: connections live in the pooled transport (transport.py), not the client.
     client = Client()
     client.set_endpoint("https://cloud.appwrite.io/v1")
     client.set_project(os.environ["APPWRITE_PROJECT_ID"])
     return client
 
 
+@lru_cache(maxsize=1)
+def get_admin_client() -> Client:
+    """Client with the server API key, built on first use rather than at import."""
+    return get_client().set_key(os.environ["APPWRITE_API_KEY"])
+
+
 def _get_jwt(token: str | None) -> str | None:
     """Extract bearer token from Authorization header."""
     if token and token.startswith("Bearer "):
@@ -45,6 +68,32 @@ def get_user_account(jwt: str | None = None) -> Account:
     return Account(get_user_client(jwt))
 
 
+def get_account(jwt: str | None = None) -> dict:
+    """The account behind ``jwt`` (default: the request's), cached briefly.
+
+    Only successful lookups are cached, so a rejected JWT is checked with
+    Appwrite every time. Raises whatever ``Account.get`` raises.
+    """
+    if jwt is None:
+        jwt = _get_jwt(request.headers.get("X-Appwrite-JWT"))
+    if not jwt:
+        return get_user_account(jwt).get()
+
+    key = content_key("jwt", jwt)
+    if (account := session_cache.get(key)) is None:
+        account = get_user_account(jwt).get()
+        session_cache.put(key, account)
+    return account
+
+
+def forget_account(jwt: str | None = None):
+    """Drop the cached account of ``jwt`` (default: the request's)."""
+    if jwt is None:
+        jwt = _get_jwt(request.headers.get("X-Appwrite-JWT"))
+    if jwt:
+        session_cache.pop(content_key("jwt", jwt))
+
+
 names = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
 
 
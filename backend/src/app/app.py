@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -8,6 +9,7 @@ from flask_limiter.util import get_remote_address
 from flask_socketio import SocketIO
 
 from . import limit
+from .startup import PREWARM, warm
 
 if debug := os.getenv("DEBUG", "True") == "True":
     from dotenv import load_dotenv
@@ -28,7 +30,7 @@ limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
+    storage_uri=os.environ.get("RATELIMIT_STORAGE_URI", "memory://"),
     strategy="fixed-window",
 )
 
@@ -44,11 +46,32 @@ def get_static(file):
 
 
 jwt = JWTManager(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    message_queue=os.environ.get("SOCKETIO_MESSAGE_QUEUE"),
+)
+socketio.on_namespace(LiveScoringNamespace("/live"))
 limit(limiter)
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="note-backend")
+    parser.add_argument("command", nargs="?", choices=["serve"], default="serve")
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        help="serve with pre-forked gunicorn workers instead of the dev server",
+    )
+    parser.add_argument("--bind", default="0.0.0.0:8080")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="worker processes (default: one per core with SOCKETIO_MESSAGE_QUEUE, else one)",
+    )
+    parser.add_argument("--threads", type=int, default=64, help="threads per worker")
+    args = parser.parse_args(argv)
+
     logger.remove()
     logger.add(
         sys.stdout,
@@ -62,6 +85,15 @@ def main():
     )
     logger.info(app.url_map)
 
+    if args.production:
+        from .serve import serve
+
+        serve(args.bind, args.workers, args.threads)
+        return
+
+    if PREWARM:
+        warm()
+
     socketio.run(
         app,
         host="0.0.0.0",  # nosec B104: required for container networking
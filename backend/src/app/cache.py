@@ -0,0 +1,192 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from loguru import logger
+
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(tempfile.gettempdir(), "note"))
+
+
+def content_key(*parts: bytes | str) -> str:
+    """SHA-256 hex digest of ``parts``, length-prefixed so they cannot run together."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Content-addressed byte store in a directory, evicted LRU by total size.
+
+    Entries are files named by their key (see ``content_key``) and written
+    atomically, so concurrent processes sharing the directory only ever see
+    whole entries. Recency is the file's modification time, bumped on every
+    hit; when the tracked size exceeds ``max_bytes`` the least recently used
+    files are removed.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.directory = os.path.join(CACHE_DIR, name)
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                if file.startswith("."):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def path(self, key: str) -> Optional[str]:
+        """Path of the entry for ``key``, marked as recently used, or None."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def get(self, key: str) -> Optional[bytes]:
+        if (path := self.path(key)) is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: bytes) -> str:
+        """Store ``value`` under ``key`` and return its path."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".")
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(value)
+        try:
+            previous = os.path.getsize(path)
+        except FileNotFoundError:
+            previous = 0
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._size += len(value) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+        logger.debug(f"Evicted {self.directory} down to {self._size} bytes")
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class TTLCache:
+    """In-process mapping whose entries expire ``ttl`` seconds after being set.
+
+    At most ``max_entries`` are kept and, if ``max_bytes`` is set, at most that
+    many bytes as reported by ``put``; beyond either the least recently used
+    entries are dropped, though the newest entry is always kept. Safe to share
+    between threads, not between processes.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._size = 0
+        # key -> (expiry, size, value), least recently used first.
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    self._size -= entry[1]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(
+        self, key: Hashable, value: Any, size: int = 0, ttl: Optional[float] = None
+    ):
+        """Store ``value``, counting ``size`` bytes against ``max_bytes``.
+
+        ``ttl`` overrides the cache's for this entry.
+        """
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._size -= previous[1]
+            self._entries[key] = (expires, size, value)
+            self._size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None
+                and self._size > self.max_bytes
+                and len(self._entries) > 1
+            ):
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._size -= evicted
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+        return None if entry is None else entry[2]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
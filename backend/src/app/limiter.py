@@ -6,7 +6,15 @@ def limit(limiter: Limiter):
 
     limiter.limit("20 per minute")(api_bp)
 
-    from .api.scoring.audio import receive_audio, receive_notes
+    from .api.scoring.audio import (
+        job_status,
+        receive_audio,
+        receive_notes,
+        receive_takes,
+    )
 
     limiter.limit("1 per 5 seconds")(receive_audio)
     limiter.limit("1 per 5 seconds")(receive_notes)
+    limiter.limit("1 per 5 seconds")(receive_takes)
+    # Running jobs are polled; allow that without tripping the blueprint limit.
+    limiter.limit("2 per second")(job_status)
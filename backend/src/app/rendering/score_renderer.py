@@ -3,7 +3,6 @@ import subprocess
 import uuid
 from tempfile import TemporaryDirectory
 
-import fitz
 from loguru import logger
 
 
@@ -12,6 +11,8 @@ def pdf_preview(pdf_bytes, filename):
     Uses PyMuPDF to extract the first page of a PDF (provided as byte content) as a PNG image.
     Returns a tuple of (image_bytes, generated_filename).
     """
+    import fitz
+
     try:
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         page = doc.load_page(0)
@@ -2,3 +2,6 @@ from .notes_pb2 import *
 from .extract_files import *
 from .edit_distance import *
 from .tempo import *
+from .locator import *
+from .reference import *
+from .streaming import *
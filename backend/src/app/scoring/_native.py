@@ -4,12 +4,14 @@ import importlib
 import importlib.machinery
 import importlib.util
 import sys
+from functools import cache
 from pathlib import Path
 from types import ModuleType
 
 _NATIVE_MODULE = "scoring_native"
 
 
+@cache
 def load_native() -> ModuleType:
     """Import the compiled scoring_native module, falling back to local build artifacts."""
     try:
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+
 import numpy as np
 from google.protobuf.internal.containers import RepeatedCompositeFieldContainer
 
@@ -10,10 +12,35 @@ from ..timer import timeit
 
 OCTAVE_CHECK_SECS = 0.1
 ROUND_TO = 0.1
+# Bytes the alignment DP may allocate per call. Larger alignments switch to the
+# checkpointed native path, which trades a second DP pass for O(sqrt(n)·m) memory.
+ALIGNMENT_MEMORY_LIMIT = int(
+    os.environ.get("ALIGNMENT_MEMORY_LIMIT", 256 * 1024 * 1024)
+)
 
 scoring_native = load_native()
 
 
+# Row layout of the edit arrays returned by ``scoring_native.edit_dist_array``.
+# A missing target index is stored as -1.
+EDIT_DTYPE = np.dtype(
+    [
+        ("kind", np.int64),
+        ("s_index", np.int64),
+        ("t_index", np.int64),
+        ("pos", np.int64),
+        ("t_pos", np.int64),
+    ]
+)
+
+
+# ``EditOperation`` for each native op kind (substitute, delete, insert).
+_NATIVE_OPERATIONS = np.array(
+    [EditOperation.SUBSTITUTE, EditOperation.DELETE, EditOperation.INSERT],
+    dtype=np.int64,
+)
+
+
 def key(note: Note) -> tuple[int, float, int]:
     return note.page, round(note.start_time / ROUND_TO) * ROUND_TO, note.pitch
 
@@ -25,11 +52,24 @@ def preprocess(
     """Sort notes and extract pitch/time arrays for native processing."""
     s.sort(key=key)
     t.sort(key=key)
-    s_pitches = np.fromiter((n.pitch for n in s), dtype=np.int64)
-    t_pitches = np.fromiter((n.pitch for n in t), dtype=np.int64)
-    s_times = np.fromiter((n.start_time for n in s), dtype=np.float32)
-    t_times = np.fromiter((n.start_time for n in t), dtype=np.float32)
-    return s_pitches, t_pitches, s_times, t_times
+    return note_pitches(s), note_pitches(t), note_times(s), note_times(t)
+
+
+def note_pitches(notes: RepeatedCompositeFieldContainer[Note]) -> np.ndarray:
+    """MIDI pitches as a contiguous int64 array, the layout the native core reads."""
+    return np.fromiter((n.pitch for n in notes), dtype=np.int64, count=len(notes))
+
+
+def note_ids(notes: RepeatedCompositeFieldContainer[Note]) -> np.ndarray:
+    """``Note.id`` values as an int64 array, used by the compact edit form."""
+    return np.fromiter((n.id for n in notes), dtype=np.int64, count=len(notes))
+
+
+def note_times(notes: RepeatedCompositeFieldContainer[Note]) -> np.ndarray:
+    """Onset times as a contiguous float32 array, the layout the native core reads."""
+    return np.fromiter(
+        (n.start_time for n in notes), dtype=np.float32, count=len(notes)
+    )
 
 
 def _clamp_index(seq_len: int, idx: int) -> int:
@@ -43,49 +83,48 @@ def _clamp_index(seq_len: int, idx: int) -> int:
 
 
 def build_protobuf(
-    native_ops,
+    native_ops: np.ndarray,
     s: RepeatedCompositeFieldContainer[Note],
     t: RepeatedCompositeFieldContainer[Note],
 ) -> ScoringResult:
     edit_list = ScoringResult()
-    for record in native_ops:
-        kind = int(record.kind)
+    for kind, s_index, t_index, pos, t_pos in native_ops.tolist():
         if kind == 0:
-            if record.t_index is None:
+            if t_index < 0:
                 raise ValueError("Substitution missing target index")
-            s_idx = _clamp_index(len(s), int(record.s_index))
-            t_idx = _clamp_index(len(t), int(record.t_index))
+            s_idx = _clamp_index(len(s), s_index)
+            t_idx = _clamp_index(len(t), t_index)
             edit_list.edits.append(
                 Edit(
                     operation=EditOperation.SUBSTITUTE,
-                    pos=int(record.pos),
+                    pos=pos,
                     s_char=s[s_idx],
                     t_char=t[t_idx],
-                    t_pos=int(record.t_pos),
+                    t_pos=t_pos,
                 )
             )
         elif kind == 1:
-            s_idx = _clamp_index(len(s), int(record.s_index))
+            s_idx = _clamp_index(len(s), s_index)
             edit_list.edits.append(
                 Edit(
                     operation=EditOperation.DELETE,
-                    pos=int(record.pos),
+                    pos=pos,
                     s_char=s[s_idx],
-                    t_pos=int(record.t_pos),
+                    t_pos=t_pos,
                 )
             )
         elif kind == 2:
-            if record.t_index is None:
+            if t_index < 0:
                 raise ValueError("Insertion missing target index")
-            s_idx = _clamp_index(len(s), int(record.s_index))
-            t_idx = _clamp_index(len(t), int(record.t_index))
+            s_idx = _clamp_index(len(s), s_index)
+            t_idx = _clamp_index(len(t), t_index)
             edit_list.edits.append(
                 Edit(
                     operation=EditOperation.INSERT,
-                    pos=int(record.pos),
+                    pos=pos,
                     s_char=s[s_idx],
                     t_char=t[t_idx],
-                    t_pos=int(record.t_pos),
+                    t_pos=t_pos,
                 )
             )
         else:
@@ -93,23 +132,114 @@ def build_protobuf(
     return edit_list
 
 
-def adjust_confidence(edit_list: ScoringResult, times, pitches) -> None:
+def deletion_confidence(
+    starts: np.ndarray, targets: np.ndarray, times, pitches
+) -> np.ndarray:
+    """Confidence of deleted reference notes with onsets ``starts`` and pitches
+    ``targets``, checked against all reference ``times``/``pitches`` at once.
+
+    A deletion with another reference note an octave (±12) away within
+    ``OCTAVE_CHECK_SECS`` gets 3, one with a third (±4) away gets 4, others 5.
+    """
+    if len(starts) == 0 or len(times) == 0:
+        return np.full(len(starts), 5, dtype=np.int64)
+
     order = np.argsort(times)
     times = times[order]
-    pitches = pitches[order]
-    for edit in edit_list.edits:
-        note = edit.s_char
-        note.confidence = 5
+    pitches = pitches[order].astype(np.int64)
+
+    targets = np.asarray(targets, dtype=np.int64)
+    lo = np.searchsorted(times, starts - OCTAVE_CHECK_SECS, side="left")
+    hi = np.searchsorted(times, starts + OCTAVE_CHECK_SECS, side="right")
+
+    # Sorting (pitch, position) keys turns "is pitch p anywhere in lo:hi" into
+    # a single searchsorted per query.
+    size = len(pitches)
+    keys = np.sort(pitches * size + np.arange(size))
+
+    def has_pitch(offset: int) -> np.ndarray:
+        base = (targets + offset) * size
+        pos = np.searchsorted(keys, base + lo, side="left")
+        found = keys[np.minimum(pos, size - 1)]
+        return (pos < size) & (found < base + hi)
+
+    octave = has_pitch(12) | has_pitch(-12)
+    third = has_pitch(4) | has_pitch(-4)
+    return np.where(octave, 3, np.where(third, 4, 5))
+
+
+def adjust_confidence(edit_list: ScoringResult, times, pitches) -> None:
+    """Lower the confidence of deletions that are likely transcription errors.
+
+    Deletions get the confidence from ``deletion_confidence``; every other edit
+    gets 5. All deletions are checked in one batch.
+    """
+    edits = edit_list.edits
+    deletes = []
+    for edit in edits:
+        edit.s_char.confidence = 5
         if edit.operation == EditOperation.DELETE:
-            start = note.start_time - OCTAVE_CHECK_SECS
-            end = note.start_time + OCTAVE_CHECK_SECS
-            lo = np.searchsorted(times, start, side="left")
-            hi = np.searchsorted(times, end, side="right")
-            local = pitches[lo:hi]
-            if np.any(local == note.pitch + 12) or np.any(local == note.pitch - 12):
-                note.confidence = 3
-            elif np.any(local == note.pitch + 4) or np.any(local == note.pitch - 4):
-                note.confidence = 4
+            deletes.append(edit.s_char)
+    if not deletes:
+        return
+
+    starts = np.fromiter((n.start_time for n in deletes), np.float64, len(deletes))
+    targets = np.fromiter((n.pitch for n in deletes), np.int64, len(deletes))
+    confidence = deletion_confidence(starts, targets, times, pitches).tolist()
+    for note, value in zip(deletes, confidence):
+        note.confidence = value
+
+
+@timeit()
+def build_compact(
+    native_ops: np.ndarray,
+    s_ids: np.ndarray,
+    t_len: int,
+    s_times: np.ndarray,
+    s_pitches: np.ndarray,
+) -> ScoringResult:
+    """Index-referencing counterpart of ``build_protobuf`` + ``postprocess``.
+
+    Fills ``ScoringResult.compact_edits`` column by column straight from the
+    native op array: reference notes are referenced by ``Note.id`` and played
+    notes by their index in the take, so no ``Note`` message is copied.
+    """
+    edit_list = ScoringResult()
+    edit_list.compact_edits.SetInParent()
+    if len(native_ops) == 0:
+        return edit_list
+
+    kinds = native_ops["kind"]
+    if kinds.min() < 0 or kinds.max() > 2:
+        bad = kinds[(kinds < 0) | (kinds > 2)][0]
+        raise ValueError(f"Unknown edit op kind {bad}")
+    if len(s_ids) == 0:
+        raise ValueError("Cannot clamp index for empty sequence")
+
+    is_delete = kinds == 1
+    t_index = native_ops["t_index"]
+    if np.any(~is_delete & (t_index < 0)):
+        raise ValueError("Substitution or insertion missing target index")
+    if t_len == 0 and not is_delete.all():
+        raise ValueError("Cannot clamp index for empty sequence")
+
+    s_idx = np.clip(native_ops["s_index"], 0, len(s_ids) - 1)
+    t_ids = np.where(is_delete, -1, np.clip(t_index, 0, max(t_len - 1, 0)))
+
+    confidence = np.full(len(kinds), 5, dtype=np.int64)
+    deleted = s_idx[is_delete]
+    confidence[is_delete] = deletion_confidence(
+        s_times[deleted].astype(np.float64), s_pitches[deleted], s_times, s_pitches
+    )
+
+    compact = edit_list.compact_edits
+    compact.operations.extend(_NATIVE_OPERATIONS[kinds].tolist())
+    compact.s_ids.extend(s_ids[s_idx].tolist())
+    compact.t_ids.extend(t_ids.tolist())
+    compact.pos.extend(native_ops["pos"].tolist())
+    compact.t_pos.extend(native_ops["t_pos"].tolist())
+    compact.confidence.extend(confidence.tolist())
+    return edit_list
 
 
 @timeit()
@@ -120,37 +250,248 @@ def postprocess(edit_list: ScoringResult, s_times, s_pitches) -> ScoringResult:
 
 @timeit()
 def edit_distance(
-    s_pitches, t_pitches, s_raw, t_raw, free_ins: tuple[int, int] | None = None
+    s_pitches,
+    t_pitches,
+    s_raw,
+    t_raw,
+    free_ins: tuple[int, int] | None = None,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int | None = None,
+    anchor_length: int | None = None,
 ):
-    native_ops, aligned_indices, total_cost = scoring_native.edit_dist(
-        s_pitches.tolist(),
-        t_pitches.tolist(),
+    native_ops, aligned_indices, total_cost = native_edit_dist(
+        s_pitches, t_pitches, free_ins, window, band, memory_limit, anchor_length
+    )
+    return build_protobuf(native_ops, s_raw, t_raw), aligned_indices, total_cost
+
+
+def native_edit_dist(
+    s_pitches: np.ndarray,
+    t_pitches: np.ndarray,
+    free_ins: tuple[int, int] | None = None,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int | None = None,
+    anchor_length: int | None = None,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Align pitch arrays without boxing them into Python lists.
+
+    Returns the edits as a structured ``EDIT_DTYPE`` array, the aligned
+    ``(reference, played)`` index pairs as an ``(n, 2)`` int64 array and the
+    total cost.
+
+    With ``anchor_length`` and no ``window``, runs of that many pitches found
+    exactly once in both sequences are matched directly and only the gaps
+    between them are aligned, in parallel. This is near linear for mostly
+    correct takes but may cost slightly more than the full alignment.
+    """
+    s_pitches = np.ascontiguousarray(s_pitches, dtype=np.int64)
+    t_pitches = np.ascontiguousarray(t_pitches, dtype=np.int64)
+    if anchor_length and window is None:
+        ops, aligned, total_cost = scoring_native.edit_dist_anchored_array(
+            s_pitches, t_pitches, free_ins, anchor_length, memory_limit
+        )
+    else:
+        ops, aligned, total_cost = scoring_native.edit_dist_array(
+            s_pitches, t_pitches, free_ins, window, band, memory_limit
+        )
+    return ops.view(EDIT_DTYPE).reshape(-1), aligned, int(total_cost)
+
+
+def native_edit_dist_batch(
+    s_pitches: np.ndarray,
+    takes: list[np.ndarray],
+    free_ins: tuple[int, int] | None = None,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int | None = None,
+) -> list[tuple[np.ndarray, np.ndarray, int]]:
+    """Batch form of ``native_edit_dist``: one reference, many played takes.
+
+    The native call releases the GIL and aligns the takes in parallel.
+    """
+    results = scoring_native.edit_dist_batch(
+        np.ascontiguousarray(s_pitches, dtype=np.int64),
+        [np.ascontiguousarray(t, dtype=np.int64) for t in takes],
         free_ins,
+        window,
+        band,
+        memory_limit,
     )
-    return build_protobuf(native_ops, s_raw, t_raw), aligned_indices, int(total_cost)
+    return [
+        (ops.view(EDIT_DTYPE).reshape(-1), aligned, int(total_cost))
+        for ops, aligned, total_cost in results
+    ]
 
 
 def find_edit_ops(
     s: RepeatedCompositeFieldContainer[Note],
     t: RepeatedCompositeFieldContainer[Note],
     free_ins: tuple[int, int, int] | None = None,
-) -> tuple[ScoringResult, list[tuple[int, int]], int]:
-    """Compute edit operations and alignment using the native Rust core."""
+    *,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int = ALIGNMENT_MEMORY_LIMIT,
+    compact: bool = False,
+    anchor_length: int | None = None,
+) -> tuple[ScoringResult, np.ndarray, int]:
+    """Compute edit operations and alignment using the native Rust core.
 
-    n, m = len(s), len(t)
-    if n + m > 10000:
-        raise ValueError(f"Too big: {n + m}")
+    The aligned ``(reference, played)`` index pairs are returned as an
+    ``(n, 2)`` int64 array.
+
+    ``window`` is a ``(start, end)`` range of reference indices the played notes
+    are expected to cover. When given, only those reference rows are aligned
+    against the whole take and notes outside it are treated as skipped, so the
+    cost is O(window·m) instead of O(n·m). ``band`` further limits each row to
+    ``band`` columns around the diagonal of the window.
+
+    Alignments whose DP would exceed ``memory_limit`` bytes run on the
+    checkpointed native path; a ``ValueError`` is raised only if even that
+    does not fit.
+
+    ``anchor_length`` enables anchored alignment for unwindowed calls (see
+    ``native_edit_dist``), meant for long performances.
+
+    With ``compact`` the edits are returned in ``ScoringResult.compact_edits``
+    (see ``build_compact``) instead of as ``Edit`` messages with note copies.
+    """
 
     s_pitches, t_pitches, s_times, _ = preprocess(s, t)
-    edit_list, aligned_indices, total_cost = edit_distance(
-        s_pitches, t_pitches, s, t, free_ins
+    return align_sorted(
+        s,
+        t,
+        s_pitches,
+        t_pitches,
+        s_times,
+        free_ins,
+        window=window,
+        band=band,
+        memory_limit=memory_limit,
+        compact=compact,
+        anchor_length=anchor_length,
+    )
+
+
+def align_sorted(
+    s: RepeatedCompositeFieldContainer[Note],
+    t: RepeatedCompositeFieldContainer[Note],
+    s_pitches: np.ndarray,
+    t_pitches: np.ndarray,
+    s_times: np.ndarray,
+    free_ins: tuple[int, int] | None = None,
+    *,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int = ALIGNMENT_MEMORY_LIMIT,
+    compact: bool = False,
+    s_ids: np.ndarray | None = None,
+    anchor_length: int | None = None,
+) -> tuple[ScoringResult, np.ndarray, int]:
+    """Core of ``find_edit_ops`` for notes already sorted by ``key``.
+
+    Neither note sequence nor array is modified, so precompiled reference data
+    can be passed in directly; ``s_ids`` optionally supplies the reference ids
+    used by the compact form.
+    """
+    if compact:
+        native_ops, aligned_pairs, total_cost = native_edit_dist(
+            s_pitches,
+            t_pitches,
+            free_ins,
+            window,
+            band,
+            memory_limit,
+            anchor_length,
+        )
+        if s_ids is None:
+            s_ids = note_ids(s)
+        edit_list = build_compact(native_ops, s_ids, len(t), s_times, s_pitches)
+        return edit_list, aligned_pairs, total_cost
+
+    edit_list, aligned_pairs, total_cost = edit_distance(
+        s_pitches,
+        t_pitches,
+        s,
+        t,
+        free_ins,
+        window,
+        band,
+        memory_limit,
+        anchor_length,
     )
-    aligned_pairs = [(int(a), int(b)) for a, b in aligned_indices]
     edit_list = postprocess(edit_list, s_times, s_pitches)
 
     return edit_list, aligned_pairs, total_cost
 
 
+@timeit()
+def find_edit_ops_batch(
+    s: RepeatedCompositeFieldContainer[Note],
+    takes: list[RepeatedCompositeFieldContainer[Note]],
+    *,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int = ALIGNMENT_MEMORY_LIMIT,
+    compact: bool = False,
+) -> list[tuple[ScoringResult, np.ndarray, int]]:
+    """Align several takes of the same score against one reference.
+
+    Equivalent to calling ``find_edit_ops`` once per take, but the alignments
+    run in a single native call that spreads the takes across all cores.
+    """
+
+    s.sort(key=key)
+    for t in takes:
+        t.sort(key=key)
+    return align_sorted_batch(
+        s,
+        takes,
+        note_pitches(s),
+        note_times(s),
+        window=window,
+        band=band,
+        memory_limit=memory_limit,
+        compact=compact,
+    )
+
+
+def align_sorted_batch(
+    s: RepeatedCompositeFieldContainer[Note],
+    takes: list[RepeatedCompositeFieldContainer[Note]],
+    s_pitches: np.ndarray,
+    s_times: np.ndarray,
+    *,
+    window: tuple[int, int] | None = None,
+    band: int | None = None,
+    memory_limit: int = ALIGNMENT_MEMORY_LIMIT,
+    compact: bool = False,
+    s_ids: np.ndarray | None = None,
+) -> list[tuple[ScoringResult, np.ndarray, int]]:
+    """Batch form of ``align_sorted``; ``s`` and every take must be sorted."""
+    results = native_edit_dist_batch(
+        s_pitches,
+        [note_pitches(t) for t in takes],
+        None,
+        window,
+        band,
+        memory_limit,
+    )
+    if compact and s_ids is None:
+        s_ids = note_ids(s)
+
+    scored = []
+    for t, (native_ops, aligned_pairs, total_cost) in zip(takes, results):
+        if compact:
+            edit_list = build_compact(native_ops, s_ids, len(t), s_times, s_pitches)
+        else:
+            edit_list = build_protobuf(native_ops, s, t)
+            edit_list = postprocess(edit_list, s_times, s_pitches)
+        scored.append((edit_list, aligned_pairs, total_cost))
+    return scored
+
+
 def print_wrong_notes(edit_list: ScoringResult, limit: int = 99999) -> None:
     """Print only the edits that incur cost."""
     print("Edit operations:")
@@ -3,12 +3,14 @@ from __future__ import annotations
 from functools import lru_cache
 from io import BytesIO
 from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING
 from zipfile import ZipFile
 
-import muspy
-
 from .notes_pb2 import *
 
+if TYPE_CHECKING:
+    import muspy
+
 ROUND_TO = 0.1
 
 
@@ -18,6 +20,9 @@ def key(note):
 
 @lru_cache
 def extract_mxl_notes(mxl_bytes):
+    # muspy pulls in scipy and music21, so it is only imported when needed.
+    import muspy
+
     mxl_stream = BytesIO(mxl_bytes)
     with ZipFile(mxl_stream) as zip_file:
         try:
@@ -89,6 +94,8 @@ def _build_time_converter(music: muspy.Music):
 
 
 def extract_midi_notes(midi_file: str) -> NoteList:
+    import muspy
+
     music = muspy.read_midi(midi_file)
     to_seconds = _build_time_converter(music)
 
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+# Consecutive pitch intervals per index key; a key covers LOCATOR_NGRAM + 1 notes.
+LOCATOR_NGRAM = 3
+# Keys occurring more often than this (repeated notes, scales) carry almost no
+# position information and are ignored when locating.
+LOCATOR_MAX_POSTINGS = int(os.environ.get("LOCATOR_MAX_POSTINGS", 256))
+# Reference notes added on both sides of a located range.
+LOCATOR_MARGIN = 16
+
+_INTERVAL_RANGE = 255
+
+
+def interval_keys(pitches: np.ndarray, ngram: int = LOCATOR_NGRAM) -> np.ndarray:
+    """Key of the ``ngram`` pitch intervals starting at every note.
+
+    Intervals are clipped to ±127 semitones and packed base 255, so keys are
+    transposition invariant and equal exactly when the intervals are.
+    """
+    pitches = np.asarray(pitches, dtype=np.int64)
+    count = len(pitches) - ngram
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    intervals = np.clip(np.diff(pitches), -127, 127) + 127
+    keys = np.zeros(count, dtype=np.int64)
+    for k in range(ngram):
+        keys = keys * _INTERVAL_RANGE + intervals[k : k + count]
+    return keys
+
+
+@dataclass(frozen=True)
+class IntervalIndex:
+    """Sorted pitch-interval n-gram index over a reference pitch sequence.
+
+    ``keys`` holds every reference key in sorted order and ``positions`` the
+    reference index each one starts at, so the postings of a key are one
+    ``searchsorted`` away.
+    """
+
+    keys: np.ndarray
+    positions: np.ndarray
+    length: int
+    ngram: int = LOCATOR_NGRAM
+
+    @classmethod
+    def build(cls, pitches: np.ndarray, ngram: int = LOCATOR_NGRAM) -> IntervalIndex:
+        keys = interval_keys(pitches, ngram)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys, positions = keys[order], order.astype(np.int64)
+        sorted_keys.setflags(write=False)
+        positions.setflags(write=False)
+        return cls(sorted_keys, positions, len(pitches), ngram)
+
+    def locate(
+        self,
+        pitches: np.ndarray,
+        top_k: int = 3,
+        margin: int = LOCATOR_MARGIN,
+    ) -> list[tuple[int, int, int]]:
+        """Candidate reference ranges ``(start, end, votes)`` for a played snippet.
+
+        Every snippet key found in the index votes for the diagonal
+        ``reference_pos - snippet_pos``; diagonals within a quarter of the
+        snippet length of each other pool their votes. The ``top_k`` best,
+        non-overlapping diagonals are returned best first, each widened by
+        ``margin`` notes. Cost is O(k log n) in the snippet length k plus the
+        (capped) postings, independent of where in the score the snippet is.
+        """
+        query = interval_keys(pitches, self.ngram)
+        if len(query) == 0 or len(self.keys) == 0:
+            return []
+
+        lo = np.searchsorted(self.keys, query, side="left")
+        hi = np.searchsorted(self.keys, query, side="right")
+        counts = hi - lo
+        usable = (counts > 0) & (counts <= LOCATOR_MAX_POSTINGS)
+        if not usable.any():
+            return []
+
+        counts, lo = counts[usable], lo[usable]
+        query_pos = np.repeat(np.flatnonzero(usable), counts)
+        first = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        ref_pos = self.positions[first + np.arange(len(query_pos))]
+        diagonals = np.sort(ref_pos - query_pos)
+
+        snippet_len = len(pitches)
+        tolerance = max(2, snippet_len // 4)
+        votes = np.searchsorted(
+            diagonals, diagonals + tolerance, side="right"
+        ) - np.arange(len(diagonals))
+
+        candidates: list[tuple[int, int, int]] = []
+        taken: list[int] = []
+        for idx in np.argsort(-votes, kind="stable").tolist():
+            diagonal = int(diagonals[idx])
+            if any(abs(diagonal - other) < snippet_len for other in taken):
+                continue
+            taken.append(diagonal)
+            start = max(0, diagonal - margin)
+            end = min(self.length, diagonal + tolerance + snippet_len + margin)
+            candidates.append((start, end, int(votes[idx])))
+            if len(candidates) == top_k:
+                break
+        return candidates
@@ -16,17 +16,17 @@ from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__
 
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x0bnotes.proto\x1a\x1fgoogle/protobuf/timestamp.proto"\x98\x01\n\x04Note\x12\r\n\x05pitch\x18\x01 \x01(\x05\x12\x12\n\nstart_time\x18\x02 \x01(\x02\x12\x10\n\x08\x64uration\x18\x03 \x01(\x02\x12\x10\n\x08velocity\x18\x04 \x01(\x02\x12\x0c\n\x04page\x18\x05 \x01(\x05\x12\r\n\x05track\x18\x06 \x01(\x05\x12\x0c\n\x04\x62\x62ox\x18\x07 \x03(\x05\x12\x12\n\nconfidence\x18\x08 \x01(\x05\x12\n\n\x02id\x18\t \x01(\x05"\\\n\x08NoteList\x12\x14\n\x05notes\x18\x01 \x03(\x0b\x32\x05.Note\x12\x0c\n\x04size\x18\x02 \x03(\x05\x12\x16\n\x06voices\x18\x03 \x03(\x0b\x32\x06.Voice\x12\x14\n\x05lines\x18\x04 \x03(\x0b\x32\x05.Line"s\n\x04\x45\x64it\x12!\n\toperation\x18\x01 \x01(\x0e\x32\x0e.EditOperation\x12\x0b\n\x03pos\x18\x02 \x01(\x05\x12\x15\n\x06s_char\x18\x03 \x01(\x0b\x32\x05.Note\x12\x15\n\x06t_char\x18\x04 \x01(\x0b\x32\x05.Note\x12\r\n\x05t_pos\x18\x05 \x01(\x05"V\n\x05Voice\x12\x13\n\x04\x63lef\x18\x01 \x01(\x0e\x32\x05.Clef\x12\r\n\x05track\x18\x02 \x01(\x05\x12\r\n\x05group\x18\x03 \x01(\x05\x12\x0c\n\x04\x62\x62ox\x18\x04 \x03(\x05\x12\x0c\n\x04page\x18\x05 \x01(\x05"G\n\x04Line\x12\x14\n\x05\x63lefs\x18\x01 \x03(\x0e\x32\x05.Clef\x12\r\n\x05group\x18\x02 \x01(\x05\x12\x0c\n\x04\x62\x62ox\x18\x03 \x03(\x05\x12\x0c\n\x04page\x18\x04 \x01(\x05"E\n\x0cTempoSection\x12\x13\n\x0bstart_index\x18\x01 \x01(\x05\x12\x11\n\tend_index\x18\x02 \x01(\x05\x12\r\n\x05tempo\x18\x03 \x01(\x02"q\n\rScoringResult\x12\x14\n\x05\x65\x64its\x18\x01 \x03(\x0b\x32\x05.Edit\x12\x0c\n\x04size\x18\x02 \x03(\x05\x12\x15\n\runstable_rate\x18\x03 \x01(\x02\x12%\n\x0etempo_sections\x18\x04 \x03(\x0b\x32\r.TempoSection"\x84\x01\n\tRecording\x12\x1f\n\x0cplayed_notes\x18\x01 \x01(\x0b\x32\t.NoteList\x12&\n\x0e\x63omputed_edits\x18\x02 \x01(\x0b\x32\x0e.ScoringResult\x12.\n\ncreated_at\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp*7\n\rEditOperation\x12\n\n\x06INSERT\x10\x00\x12\x0e\n\nSUBSTITUTE\x10\x01\x12\n\n\x06\x44\x45LETE\x10\x02*\x1c\n\x04\x43lef\x12\n\n\x06TREBLE\x10\x00\x12\x08\n\x04\x42\x41SS\x10\x01\x62\x06proto3'
+    b'\n\x0bnotes.proto\x1a\x1fgoogle/protobuf/timestamp.proto"\x98\x01\n\x04Note\x12\r\n\x05pitch\x18\x01 \x01(\x05\x12\x12\n\nstart_time\x18\x02 \x01(\x02\x12\x10\n\x08\x64uration\x18\x03 \x01(\x02\x12\x10\n\x08velocity\x18\x04 \x01(\x02\x12\x0c\n\x04page\x18\x05 \x01(\x05\x12\r\n\x05track\x18\x06 \x01(\x05\x12\x0c\n\x04\x62\x62ox\x18\x07 \x03(\x05\x12\x12\n\nconfidence\x18\x08 \x01(\x05\x12\n\n\x02id\x18\t \x01(\x05"\\\n\x08NoteList\x12\x14\n\x05notes\x18\x01 \x03(\x0b\x32\x05.Note\x12\x0c\n\x04size\x18\x02 \x03(\x05\x12\x16\n\x06voices\x18\x03 \x03(\x0b\x32\x06.Voice\x12\x14\n\x05lines\x18\x04 \x03(\x0b\x32\x05.Line"s\n\x04\x45\x64it\x12!\n\toperation\x18\x01 \x01(\x0e\x32\x0e.EditOperation\x12\x0b\n\x03pos\x18\x02 \x01(\x05\x12\x15\n\x06s_char\x18\x03 \x01(\x0b\x32\x05.Note\x12\x15\n\x06t_char\x18\x04 \x01(\x0b\x32\x05.Note\x12\r\n\x05t_pos\x18\x05 \x01(\x05"V\n\x05Voice\x12\x13\n\x04\x63lef\x18\x01 \x01(\x0e\x32\x05.Clef\x12\r\n\x05track\x18\x02 \x01(\x05\x12\r\n\x05group\x18\x03 \x01(\x05\x12\x0c\n\x04\x62\x62ox\x18\x04 \x03(\x05\x12\x0c\n\x04page\x18\x05 \x01(\x05"G\n\x04Line\x12\x14\n\x05\x63lefs\x18\x01 \x03(\x0e\x32\x05.Clef\x12\r\n\x05group\x18\x02 \x01(\x05\x12\x0c\n\x04\x62\x62ox\x18\x03 \x03(\x05\x12\x0c\n\x04page\x18\x04 \x01(\x05"E\n\x0cTempoSection\x12\x13\n\x0bstart_index\x18\x01 \x01(\x05\x12\x11\n\tend_index\x18\x02 \x01(\x05\x12\r\n\x05tempo\x18\x03 \x01(\x02"\x80\x01\n\x0c\x43ompactEdits\x12"\n\noperations\x18\x01 \x03(\x0e\x32\x0e.EditOperation\x12\r\n\x05s_ids\x18\x02 \x03(\x05\x12\r\n\x05t_ids\x18\x03 \x03(\x05\x12\x0b\n\x03pos\x18\x04 \x03(\x05\x12\r\n\x05t_pos\x18\x05 \x03(\x05\x12\x12\n\nconfidence\x18\x06 \x03(\x05"\x97\x01\n\rScoringResult\x12\x14\n\x05\x65\x64its\x18\x01 \x03(\x0b\x32\x05.Edit\x12\x0c\n\x04size\x18\x02 \x03(\x05\x12\x15\n\runstable_rate\x18\x03 \x01(\x02\x12%\n\x0etempo_sections\x18\x04 \x03(\x0b\x32\r.TempoSection\x12$\n\rcompact_edits\x18\x05 \x01(\x0b\x32\r.CompactEdits"\x84\x01\n\tRecording\x12\x1f\n\x0cplayed_notes\x18\x01 \x01(\x0b\x32\t.NoteList\x12&\n\x0e\x63omputed_edits\x18\x02 \x01(\x0b\x32\x0e.ScoringResult\x12.\n\ncreated_at\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp"/\n\rRecordingList\x12\x1e\n\nrecordings\x18\x01 \x03(\x0b\x32\n.Recording*7\n\rEditOperation\x12\n\n\x06INSERT\x10\x00\x12\x0e\n\nSUBSTITUTE\x10\x01\x12\n\n\x06\x44\x45LETE\x10\x02*\x1c\n\x04\x43lef\x12\n\n\x06TREBLE\x10\x00\x12\x08\n\x04\x42\x41SS\x10\x01\x62\x06proto3'
 )
 
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "notes_pb2", globals())
 if _descriptor._USE_C_DESCRIPTORS == False:
     DESCRIPTOR._options = None
-    _EDITOPERATION._serialized_start = 896
-    _EDITOPERATION._serialized_end = 951
-    _CLEF._serialized_start = 953
-    _CLEF._serialized_end = 981
+    _EDITOPERATION._serialized_start = 1115
+    _EDITOPERATION._serialized_end = 1170
+    _CLEF._serialized_start = 1172
+    _CLEF._serialized_end = 1200
     _NOTE._serialized_start = 49
     _NOTE._serialized_end = 201
     _NOTELIST._serialized_start = 203
@@ -39,8 +39,12 @@ if _descriptor._USE_C_DESCRIPTORS == False:
     _LINE._serialized_end = 573
     _TEMPOSECTION._serialized_start = 575
     _TEMPOSECTION._serialized_end = 644
-    _SCORINGRESULT._serialized_start = 646
-    _SCORINGRESULT._serialized_end = 759
-    _RECORDING._serialized_start = 762
-    _RECORDING._serialized_end = 894
+    _COMPACTEDITS._serialized_start = 647
+    _COMPACTEDITS._serialized_end = 775
+    _SCORINGRESULT._serialized_start = 778
+    _SCORINGRESULT._serialized_end = 929
+    _RECORDING._serialized_start = 932
+    _RECORDING._serialized_end = 1064
+    _RECORDINGLIST._serialized_start = 1066
+    _RECORDINGLIST._serialized_end = 1113
 # @@protoc_insertion_point(module_scope)
@@ -12,6 +12,22 @@ INSERT: EditOperation
 SUBSTITUTE: EditOperation
 TREBLE: Clef
 
+class CompactEdits(_message.Message):
+    __slots__ = ["confidence", "operations", "pos", "s_ids", "t_ids", "t_pos"]
+    CONFIDENCE_FIELD_NUMBER: _ClassVar[int]
+    OPERATIONS_FIELD_NUMBER: _ClassVar[int]
+    POS_FIELD_NUMBER: _ClassVar[int]
+    S_IDS_FIELD_NUMBER: _ClassVar[int]
+    T_IDS_FIELD_NUMBER: _ClassVar[int]
+    T_POS_FIELD_NUMBER: _ClassVar[int]
+    confidence: _containers.RepeatedScalarFieldContainer[int]
+    operations: _containers.RepeatedScalarFieldContainer[EditOperation]
+    pos: _containers.RepeatedScalarFieldContainer[int]
+    s_ids: _containers.RepeatedScalarFieldContainer[int]
+    t_ids: _containers.RepeatedScalarFieldContainer[int]
+    t_pos: _containers.RepeatedScalarFieldContainer[int]
+    def __init__(self, operations: _Optional[_Iterable[_Union[EditOperation, str]]] = ..., s_ids: _Optional[_Iterable[int]] = ..., t_ids: _Optional[_Iterable[int]] = ..., pos: _Optional[_Iterable[int]] = ..., t_pos: _Optional[_Iterable[int]] = ..., confidence: _Optional[_Iterable[int]] = ...) -> None: ...
+
 class Edit(_message.Message):
     __slots__ = ["operation", "pos", "s_char", "t_char", "t_pos"]
     OPERATION_FIELD_NUMBER: _ClassVar[int]
@@ -82,17 +98,25 @@ class Recording(_message.Message):
     played_notes: NoteList
     def __init__(self, played_notes: _Optional[_Union[NoteList, _Mapping]] = ..., computed_edits: _Optional[_Union[ScoringResult, _Mapping]] = ..., created_at: _Optional[_Union[_timestamp_pb2.Timestamp, _Mapping]] = ...) -> None: ...
 
+class RecordingList(_message.Message):
+    __slots__ = ["recordings"]
+    RECORDINGS_FIELD_NUMBER: _ClassVar[int]
+    recordings: _containers.RepeatedCompositeFieldContainer[Recording]
+    def __init__(self, recordings: _Optional[_Iterable[_Union[Recording, _Mapping]]] = ...) -> None: ...
+
 class ScoringResult(_message.Message):
-    __slots__ = ["edits", "size", "tempo_sections", "unstable_rate"]
+    __slots__ = ["compact_edits", "edits", "size", "tempo_sections", "unstable_rate"]
+    COMPACT_EDITS_FIELD_NUMBER: _ClassVar[int]
     EDITS_FIELD_NUMBER: _ClassVar[int]
     SIZE_FIELD_NUMBER: _ClassVar[int]
     TEMPO_SECTIONS_FIELD_NUMBER: _ClassVar[int]
     UNSTABLE_RATE_FIELD_NUMBER: _ClassVar[int]
+    compact_edits: CompactEdits
     edits: _containers.RepeatedCompositeFieldContainer[Edit]
     size: _containers.RepeatedScalarFieldContainer[int]
     tempo_sections: _containers.RepeatedCompositeFieldContainer[TempoSection]
     unstable_rate: float
-    def __init__(self, edits: _Optional[_Iterable[_Union[Edit, _Mapping]]] = ..., size: _Optional[_Iterable[int]] = ..., unstable_rate: _Optional[float] = ..., tempo_sections: _Optional[_Iterable[_Union[TempoSection, _Mapping]]] = ...) -> None: ...
+    def __init__(self, edits: _Optional[_Iterable[_Union[Edit, _Mapping]]] = ..., size: _Optional[_Iterable[int]] = ..., unstable_rate: _Optional[float] = ..., tempo_sections: _Optional[_Iterable[_Union[TempoSection, _Mapping]]] = ..., compact_edits: _Optional[_Union[CompactEdits, _Mapping]] = ...) -> None: ...
 
 class TempoSection(_message.Message):
     __slots__ = ["end_index", "start_index", "tempo"]
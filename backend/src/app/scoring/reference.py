@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from google.protobuf.internal.containers import RepeatedCompositeFieldContainer
+
+from .edit_distance import (
+    ALIGNMENT_MEMORY_LIMIT,
+    align_sorted,
+    align_sorted_batch,
+    key,
+    note_ids,
+    note_pitches,
+    note_times,
+)
+from .locator import LOCATOR_MARGIN, IntervalIndex
+from .notes_pb2 import Note, NoteList, ScoringResult
+from ..timer import timeit
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array = np.ascontiguousarray(array)
+    array.setflags(write=False)
+    return array
+
+
+@dataclass(frozen=True)
+class CompiledReference:
+    """Reference score preprocessed once so requests can align against it directly.
+
+    Notes are sorted by ``key`` and stored column-wise in read-only arrays.
+    ``starts`` doubles as the reference input of ``analyze_tempo``. ``order[i]``
+    is the position of sorted note ``i`` in the NoteList it was compiled from,
+    and the notes of page ``p`` are ``page_offsets[p]:page_offsets[p + 1]``.
+    ``intervals`` indexes the pitch intervals for ``locate``.
+
+    ``notes`` is the sorted NoteList edits copy reference notes from; protobuf
+    messages cannot be frozen, so callers must treat it as read-only.
+    """
+
+    notes: NoteList
+    pitches: np.ndarray
+    starts: np.ndarray
+    pages: np.ndarray
+    ids: np.ndarray
+    order: np.ndarray
+    page_offsets: np.ndarray
+    size: tuple[int, ...]
+    intervals: IntervalIndex
+
+    def __len__(self) -> int:
+        return len(self.pitches)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held, counting the notes at their serialized size."""
+        arrays = (
+            self.pitches,
+            self.starts,
+            self.pages,
+            self.ids,
+            self.order,
+            self.page_offsets,
+            self.intervals.keys,
+            self.intervals.positions,
+        )
+        return self.notes.ByteSize() + sum(array.nbytes for array in arrays)
+
+    def page_range(self, page: int) -> tuple[int, int]:
+        """Sorted index range ``[start, end)`` of the notes on ``page``."""
+        if page < 0 or page + 1 >= len(self.page_offsets):
+            return len(self), len(self)
+        return int(self.page_offsets[page]), int(self.page_offsets[page + 1])
+
+    def focus_window(self, page: int, extension: int) -> tuple[int, int] | None:
+        """Reference index range around ``page``, widened by ``extension`` notes."""
+        start, end = self.page_range(page)
+        if start == end:
+            return None
+        return max(0, start - extension), end - 1 + extension
+
+    def locate(
+        self,
+        t: RepeatedCompositeFieldContainer[Note],
+        top_k: int = 3,
+        margin: int = LOCATOR_MARGIN,
+    ) -> list[tuple[int, int, int]]:
+        """Reference ranges ``(start, end, votes)`` the snippet ``t`` was most
+        likely played from, best first; usable as ``find_edit_ops`` windows."""
+        t.sort(key=key)
+        return self.intervals.locate(note_pitches(t), top_k, margin)
+
+    def find_edit_ops(
+        self,
+        t: RepeatedCompositeFieldContainer[Note],
+        free_ins: tuple[int, int] | None = None,
+        *,
+        window: tuple[int, int] | None = None,
+        band: int | None = None,
+        memory_limit: int = ALIGNMENT_MEMORY_LIMIT,
+        compact: bool = False,
+        anchor_length: int | None = None,
+    ) -> tuple[ScoringResult, np.ndarray, int]:
+        """``find_edit_ops`` against this reference; only ``t`` is sorted."""
+        t.sort(key=key)
+        return align_sorted(
+            self.notes.notes,
+            t,
+            self.pitches,
+            note_pitches(t),
+            self.starts,
+            free_ins,
+            window=window,
+            band=band,
+            memory_limit=memory_limit,
+            compact=compact,
+            s_ids=self.ids,
+            anchor_length=anchor_length,
+        )
+
+    @timeit()
+    def find_edit_ops_batch(
+        self,
+        takes: list[RepeatedCompositeFieldContainer[Note]],
+        *,
+        window: tuple[int, int] | None = None,
+        band: int | None = None,
+        memory_limit: int = ALIGNMENT_MEMORY_LIMIT,
+        compact: bool = False,
+    ) -> list[tuple[ScoringResult, np.ndarray, int]]:
+        """``find_edit_ops_batch`` against this reference."""
+        for t in takes:
+            t.sort(key=key)
+        return align_sorted_batch(
+            self.notes.notes,
+            takes,
+            self.pitches,
+            self.starts,
+            window=window,
+            band=band,
+            memory_limit=memory_limit,
+            compact=compact,
+            s_ids=self.ids,
+        )
+
+
+@timeit()
+def compile_reference(notes: NoteList) -> CompiledReference:
+    """Build the ``CompiledReference`` of ``notes`` without modifying it."""
+    source = notes.notes
+    order = sorted(range(len(source)), key=lambda idx: key(source[idx]))
+
+    sorted_notes = NoteList()
+    sorted_notes.size.extend(notes.size)
+    sorted_notes.notes.extend(source[idx] for idx in order)
+
+    pages = np.fromiter(
+        (n.page for n in sorted_notes.notes), dtype=np.int64, count=len(order)
+    )
+    page_count = int(pages[-1]) + 1 if len(pages) else 0
+    page_offsets = np.searchsorted(pages, np.arange(page_count + 1), side="left")
+
+    pitches = _frozen(note_pitches(sorted_notes.notes))
+    return CompiledReference(
+        notes=sorted_notes,
+        pitches=pitches,
+        starts=_frozen(note_times(sorted_notes.notes)),
+        pages=_frozen(pages),
+        ids=_frozen(note_ids(sorted_notes.notes)),
+        order=_frozen(np.asarray(order, dtype=np.int64)),
+        page_offsets=_frozen(page_offsets.astype(np.int64)),
+        size=tuple(notes.size),
+        intervals=IntervalIndex.build(pitches),
+    )
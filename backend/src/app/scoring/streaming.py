@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable
+
+import numpy as np
+
+from ._native import load_native
+from .edit_distance import key
+from .notes_pb2 import Note, NoteList, ScoringResult
+from .reference import CompiledReference
+
+scoring_native = load_native()
+
+# Correctly played notes the running tempo estimate is fitted over.
+LIVE_TEMPO_NOTES = 16
+
+
+class LiveAlignment:
+    """Follow a take against a compiled reference while it is being played.
+
+    Every pushed note advances the native ``StreamingAligner`` by one DP
+    column over the reference window, so the cost per note does not grow with
+    the take. ``finish`` aligns the complete take offline for the final result.
+    """
+
+    def __init__(
+        self, reference: CompiledReference, window: tuple[int, int] | None = None
+    ):
+        start, end = window or (0, len(reference))
+        self.reference = reference
+        self.window = window
+        self.offset = max(0, start)
+        self.aligner = scoring_native.StreamingAligner(
+            reference.pitches[self.offset : min(end, len(reference))].tolist()
+        )
+        self.played = NoteList()
+        self.played.size.extend(reference.size)
+        self._reference_times: deque[float] = deque(maxlen=LIVE_TEMPO_NOTES)
+        self._played_times: deque[float] = deque(maxlen=LIVE_TEMPO_NOTES)
+
+    def push(self, notes: Iterable[Note]) -> list[dict]:
+        """Align newly played notes, returning one update per note in play order.
+
+        ``note_id`` is the ``Note.id`` of the reference note the played note
+        was matched to (``None`` for an extra note) and ``position`` the number
+        of reference notes the take has covered.
+        """
+        batch = sorted(notes, key=key)
+        first = len(self.played.notes)
+        self.played.notes.extend(batch)
+        results = self.aligner.extend([note.pitch for note in batch])
+
+        updates = []
+        for idx, note, (s_index, matched, position, cost) in zip(
+            range(first, first + len(batch)), batch, results
+        ):
+            self.played.notes[idx].id = idx
+            ref_idx = None if s_index is None else s_index + self.offset
+            if ref_idx is not None and matched:
+                self._reference_times.append(float(self.reference.starts[ref_idx]))
+                self._played_times.append(note.start_time)
+            updates.append(
+                {
+                    "index": idx,
+                    "note_id": None
+                    if ref_idx is None
+                    else int(self.reference.ids[ref_idx]),
+                    "correct": matched,
+                    "position": position + self.offset,
+                    "cost": cost,
+                }
+            )
+        return updates
+
+    def tempo(self) -> float | None:
+        """Reference seconds per played second over the last correct notes."""
+        if len(self._played_times) < 2:
+            return None
+        played = np.fromiter(self._played_times, dtype=np.float64)
+        reference = np.fromiter(self._reference_times, dtype=np.float64)
+        spread = played - played.mean()
+        variance = float(spread @ spread)
+        if variance == 0.0:
+            return None
+        return float(spread @ (reference - reference.mean()) / variance)
+
+    def finish(self, **kwargs) -> tuple[ScoringResult, np.ndarray, int]:
+        """Full offline alignment of everything played so far.
+
+        Keyword arguments are passed to ``CompiledReference.find_edit_ops``.
+        """
+        return self.reference.find_edit_ops(
+            self.played.notes, window=self.window, **kwargs
+        )
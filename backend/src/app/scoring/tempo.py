@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import numpy as np
+
 from ..timer import timeit
 from ._native import load_native
 from .notes_pb2 import TempoSection
@@ -9,16 +11,19 @@ scoring_native = load_native()
 
 @timeit()
 def analyze_tempo(
-    actual_times: list[float],
-    played_times: list[float],
-    aligned: list[tuple[int, int]],
+    actual_times: np.ndarray,
+    played_times: np.ndarray,
+    aligned: np.ndarray,
     best_params: scoring_native.TempoSegmentationParams = scoring_native.TempoSegmentationParams(),
 ) -> tuple[list[TempoSection], float]:
-    if not aligned:
+    if len(aligned) == 0:
         return [], 0.0
 
-    sections_data, unstable = scoring_native.analyze_tempo(
-        actual_times, played_times, aligned, best_params
+    sections_data, unstable = scoring_native.analyze_tempo_array(
+        np.ascontiguousarray(actual_times, dtype=np.float32),
+        np.ascontiguousarray(played_times, dtype=np.float32),
+        np.ascontiguousarray(aligned, dtype=np.int64).reshape(-1, 2),
+        best_params,
     )
 
     sections: list[TempoSection] = []
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+
+from loguru import logger
+
+from .startup import warm
+
+
+def serve(bind: str, workers: int | None = None, threads: int = 64):
+    """Run the app under gunicorn with pre-forked workers.
+
+    Workers are threaded (``gthread``), which Flask-SocketIO serves websockets
+    from in threading mode. Scoring jobs and upload sessions are in SQLite,
+    so any worker can serve them, and the reference cache is filled before
+    the fork. A live session, however, belongs to the worker its socket
+    connected to:
+
+    - with more than one worker, Socket.IO only accepts the websocket
+      transport, whose one connection stays on one worker; long-polling
+      would spread a session's requests over several;
+    - job events are emitted from the worker running the job, so more than
+      one worker needs ``SOCKETIO_MESSAGE_QUEUE`` to reach the others.
+
+    ``workers`` defaults to one per core when the queue is set, else one.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as exc:
+        raise SystemExit(
+            "Production mode needs gunicorn: pip install 'backend[serve]'"
+        ) from exc
+
+    from .app import app, socketio
+
+    has_queue = bool(os.environ.get("SOCKETIO_MESSAGE_QUEUE"))
+    if workers is None:
+        workers = multiprocessing.cpu_count() if has_queue else 1
+    elif workers > 1 and not has_queue:
+        raise SystemExit(
+            "More than one worker needs SOCKETIO_MESSAGE_QUEUE, so job events "
+            "reach sockets connected to other workers"
+        )
+    if workers > 1:
+        socketio.server.eio.transports = ["websocket"]
+
+    warm()
+
+    class ProductionServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", bind)
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("timeout", 300)
+
+        def load(self):
+            return app
+
+    logger.info(
+        f"Serving on {bind} with {workers} workers, "
+        f"Socket.IO transports: {', '.join(socketio.server.eio.transports)}"
+    )
+    ProductionServer().run()
@@ -0,0 +1,69 @@
+import importlib
+import os
+import sys
+import time
+
+# Set when the ``app`` package starts importing, for ``import_report``. Taken
+# before the imports below (hence their noqa), so their cost is part of what it
+# measures.
+IMPORT_STARTED = time.perf_counter()
+
+import numpy as np  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from .timer import timeit  # noqa: E402
+
+# Cold-start import time above this many milliseconds is logged as a warning.
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1500))
+# Import the heavy modules and hot references right after startup.
+PREWARM = os.environ.get("PREWARM", "False") == "True"
+# Reference notes compiled by ``warm``, so the first requests for them are fast.
+PREWARM_NOTES_IDS = [
+    notes_id.strip()
+    for notes_id in os.environ.get("PREWARM_NOTES_IDS", "").split(",")
+    if notes_id.strip()
+]
+# Dependencies only imported by the routes that need them, and what needs them.
+HEAVY_MODULES = {
+    "muspy": "MusicXML and MIDI extraction",
+    "fitz": "PDF previews",
+    "beam": "model deployments",
+    "magic": "audio type detection",
+}
+
+
+def import_report():
+    """Log how long importing the app took and which heavy modules it loaded.
+
+    For a per-module breakdown, run the entry point with ``python -X importtime``.
+    """
+    elapsed = (time.perf_counter() - IMPORT_STARTED) * 1000
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    log = logger.warning if elapsed > IMPORT_BUDGET_MS else logger.info
+    log(
+        f"Imported app in {elapsed:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms); "
+        f"heavy modules loaded: {', '.join(loaded) or 'none'}"
+    )
+
+
+@timeit()
+def warm(notes_ids=PREWARM_NOTES_IDS):
+    """Import everything requests load lazily, and compile hot references.
+
+    Only single-threaded native entry points are called here, since this also
+    runs before ``fork``: a thread pool started before it does not exist in
+    the children.
+    """
+    from .api.scoring.audio import preload_references
+    from .scoring._native import load_native
+
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Could not prewarm {name}: {e}")
+
+    native = load_native()
+    pitches = np.arange(60, 72, dtype=np.int64)
+    native.edit_dist_array(pitches, pitches)
+    preload_references(notes_ids)
@@ -1,7 +1,13 @@
 import sys
+import threading
 from io import BytesIO
 
 from .app import app
+from .app.startup import PREWARM, warm
+
+if PREWARM:
+    # Load lazily imported dependencies while the first invocation is served.
+    threading.Thread(target=warm, name="prewarm", daemon=True).start()
 
 
 def _to_wsgi_environ(context):
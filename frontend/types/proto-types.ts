@@ -48,11 +48,20 @@ export interface TempoSection extends Message {
   endIndex: number;
   tempo: number;
 }
+export interface CompactEdits extends Message {
+  operations: EditOperation[];
+  sIds: number[];
+  tIds: number[];
+  pos: number[];
+  tPos: number[];
+  confidence: number[];
+}
 export interface ScoringResult extends Message {
   edits: Edit[];
   size: number[];
   unstableRate: number;
   tempoSections: TempoSection[];
+  compactEdits?: CompactEdits;
 }
 export interface Timestamp extends Message {
   seconds: number | Long;
@@ -63,3 +72,6 @@ export interface Recording extends Message {
   computedEdits: ScoringResult;
   createdAt: Timestamp;
 }
+export interface RecordingList extends Message {
+  recordings: Recording[];
+}